@@ -0,0 +1,97 @@
+########################################
+# bench_caption_preprocess.py (캡션 전처리: 풀해상도 디코드 vs 축소 디코드 — 시간/피크 RSS)
+########################################
+import os, sys, io, json, time, base64, argparse, resource, subprocess, tempfile
+from PIL import Image
+
+
+def legacy_data_url(path: str, max_side: int) -> str:
+    """기존 caption_server._to_data_url: 풀해상도 디코드 → RGB → BICUBIC 리사이즈"""
+    with Image.open(path) as im:
+        im = im.convert("RGB")
+        w, h = im.size
+        m = max(w, h)
+        if m > max_side:
+            scale = max_side / m
+            im = im.resize((int(w * scale), int(h * scale)))
+        buf = io.BytesIO()
+        im.save(buf, format="JPEG", quality=85, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+def peak_rss_kb() -> int:
+    """프로세스 피크 RSS(KB). Linux 는 exec 시 리셋되는 VmHWM 을 쓴다 (ru_maxrss 는 부모 값이 이어짐)."""
+    try:
+        with open("/proc/self/status") as f:
+            for ln in f:
+                if ln.startswith("VmHWM:"):
+                    return int(ln.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(method: str, path: str, max_side: int, repeat: int):
+    """한 프로세스에서 한 가지 방식만 돌려 피크 RSS 가 섞이지 않게 한다."""
+    if method == "fast":
+        from utils.image_prep import to_jpeg_data_url as fn
+    else:
+        fn = legacy_data_url
+    base_rss = peak_rss_kb()
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(path, max_side)
+        best = min(best, time.perf_counter() - t)
+    peak = peak_rss_kb()
+    print(json.dumps({"ms": round(best * 1000, 1), "peak_rss_mb": round(peak / 1024, 1),
+                      "delta_rss_mb": round((peak - base_rss) / 1024, 1)}))
+
+
+def make_sample(dirpath: str, mp: int) -> str:
+    """mp 메가픽셀 4:3 JPEG 을 합성 (그라디언트 + 노이즈로 실제 사진과 비슷한 압축률)"""
+    w = int((mp * 1_000_000 * 4 / 3) ** 0.5)
+    h = int(w * 3 / 4)
+    path = os.path.join(dirpath, f"sample_{mp}mp.jpg")
+    if not os.path.exists(path):
+        grad = Image.linear_gradient("L").resize((w, h))
+        noise = Image.effect_noise((w, h), 40)
+        Image.merge("RGB", (grad, noise, grad.transpose(Image.Transpose.FLIP_LEFT_RIGHT))).save(path, quality=92)
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="캡션 전처리 마이크로 벤치마크")
+    ap.add_argument("--child", nargs=2, metavar=("METHOD", "PATH"), help=argparse.SUPPRESS)
+    ap.add_argument("--sizes", type=int, nargs="*", default=[3, 12, 24, 48], help="합성 이미지 메가픽셀")
+    ap.add_argument("--images", nargs="*", default=["bom.jpeg"], help="추가로 잴 실제 이미지")
+    ap.add_argument("--max_side", type=int, default=int(os.getenv("CAPTION_MAX_SIDE", "1280")))
+    ap.add_argument("--repeat", type=int, default=3)
+    a = ap.parse_args()
+
+    if a.child:
+        return child(a.child[0], a.child[1], a.max_side, a.repeat)
+
+    tmp = os.path.join(tempfile.gettempdir(), "dayline_bench_images")
+    os.makedirs(tmp, exist_ok=True)
+    cases = [(f"{mp}MP", make_sample(tmp, mp)) for mp in a.sizes]
+    cases += [(os.path.basename(p), p) for p in a.images if os.path.isfile(p)]
+
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.getcwd() + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    rows = []
+    for name, path in cases:
+        row = {"image": name, "file_mb": round(os.path.getsize(path) / 1e6, 2)}
+        for method in ("legacy", "fast"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", method, path, "--max_side", str(a.max_side), "--repeat", str(a.repeat)],
+                capture_output=True, text=True, env=env, check=True,
+            )
+            row[method] = json.loads(out.stdout)
+        row["speedup"] = round(row["legacy"]["ms"] / max(row["fast"]["ms"], 1e-6), 1)
+        rows.append(row)
+        print(json.dumps(row, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
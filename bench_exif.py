@@ -0,0 +1,59 @@
+########################################
+# bench_exif.py (EXIF 추출: PIL 경로 vs 헤더 파서 vs 배치 스캔)
+########################################
+import os, json, time, shutil, argparse, tempfile
+from utils.exif_geo import _extract_exif_meta_pil, read_exif_fast, extract_exif_batch, iter_image_paths
+
+
+def make_library(src: str, n: int) -> str:
+    """src 사진을 n 장 복사한 임시 라이브러리 (실제 파일이라 페이지 캐시 조건이 같다)"""
+    d = os.path.join(tempfile.gettempdir(), f"dayline_exif_lib_{n}")
+    os.makedirs(d, exist_ok=True)
+    for i in range(n):
+        p = os.path.join(d, f"img_{i:06d}.jpg")
+        if not os.path.exists(p):
+            shutil.copyfile(src, p)
+    return d
+
+
+def timed(fn, paths):
+    t = time.perf_counter()
+    out = [fn(p) for p in paths]
+    return time.perf_counter() - t, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="EXIF 추출 벤치마크")
+    ap.add_argument("--dir", default=None, help="사진 디렉터리 (없으면 --image 를 복사해 생성)")
+    ap.add_argument("--image", default="bom.jpeg")
+    ap.add_argument("-n", type=int, default=500, help="생성할 사진 수")
+    ap.add_argument("--workers", type=int, default=None)
+    a = ap.parse_args()
+
+    root = a.dir or make_library(a.image, a.n)
+    paths = list(iter_image_paths(root))
+
+    t_pil, pil = timed(_extract_exif_meta_pil, paths)
+    t_fast, fast = timed(read_exif_fast, paths)
+    t = time.perf_counter()
+    batch = dict(extract_exif_batch(paths, max_workers=a.workers))
+    t_batch = time.perf_counter() - t
+
+    mismatch = sum(1 for p, x, y in zip(paths, pil, fast) if y is not None and x != y)
+    n = len(paths)
+    per = lambda s: round(s / max(n, 1) * 1e6, 1)
+    print(json.dumps({
+        "files": n,
+        "pil_us_per_file": per(t_pil),
+        "fast_us_per_file": per(t_fast),
+        "batch_us_per_file": per(t_batch),
+        "speedup_fast": round(t_pil / max(t_fast, 1e-9), 1),
+        "speedup_batch": round(t_pil / max(t_batch, 1e-9), 1),
+        "est_100k_min": {"pil": round(per(t_pil) * 1e5 / 6e7, 1), "batch": round(per(t_batch) * 1e5 / 6e7, 1)},
+        "mismatch_vs_pil": mismatch,
+        "batch_errors": sum(1 for m in batch.values() if m.get("error")),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+########################################
+# bench_graph_tools.py (config.json 이미지로 ToolNode 실행 시간: 동기 툴(asyncio.run) vs async 툴)
+########################################
+import asyncio, os, sys, json, time, argparse, statistics
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")  # main/caption_server 는 import 시 OpenAI 클라이언트를 만든다
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.graph import StateGraph, END
+from langgraph.prebuilt import ToolNode
+import main
+from main import CAPTION_SERVER, EXIF_SERVER, CONFIG_PATH
+
+
+# ---------- 기존 방식: 동기 툴 안에서 호출마다 asyncio.run ----------
+@tool("caption_image_tool")
+def legacy_caption_tool(path: str) -> str:
+    """기존 caption_image_tool"""
+    out = asyncio.run(main._call_mcp_tool(CAPTION_SERVER, "caption_image", {"input": {"path": path}}))
+    return json.dumps(out, ensure_ascii=False)
+
+
+@tool("exif_metadata_tool")
+def legacy_exif_tool(path: str, weather: bool = True, address: bool = True) -> str:
+    """기존 exif_metadata_tool"""
+    args = {"input": {"path": path}, "address": bool(address)}
+    if weather:
+        args["weather"] = {"use_open_meteo": True}
+    out = asyncio.run(main._call_mcp_tool(EXIF_SERVER, "extract_image_metadata", args))
+    return json.dumps(out, ensure_ascii=False)
+
+
+def simulate(latency_s):
+    """MCP 호출을 고정 지연으로 바꾼다 (네트워크/모델 없이 ToolNode 스케줄링만 비교)"""
+    async def fake_call(server_py, tool_name, arguments, timeout=20.0):
+        await asyncio.sleep(latency_s)
+        return {"server": server_py, "tool": tool_name}
+    main._call_mcp_tool = fake_call
+
+
+def tool_calls_message(image, weather, address):
+    """에이전트가 두 툴을 한 턴에 요청한 AIMessage"""
+    return AIMessage(content="", tool_calls=[
+        {"name": "caption_image_tool", "args": {"path": image}, "id": "call_caption"},
+        {"name": "exif_metadata_tool", "args": {"path": image, "weather": weather, "address": address}, "id": "call_exif"},
+    ])
+
+
+def tools_graph(tools):
+    """ToolNode 하나만 있는 그래프 (ToolNode 는 그래프 런타임 안에서만 돈다)"""
+    g = StateGraph(main.State)
+    g.add_node("tools", ToolNode(tools))
+    g.set_entry_point("tools")
+    g.add_edge("tools", END)
+    return g.compile()
+
+
+def summarize(xs):
+    xs = sorted(xs)
+    return {"n": len(xs), "mean_ms": round(statistics.fmean(xs) * 1000, 1), "p50_ms": round(xs[len(xs) // 2] * 1000, 1)}
+
+
+async def main_async():
+    ap = argparse.ArgumentParser(description="그래프 툴 실행 벤치마크 (config.json 기준)")
+    ap.add_argument("--config", default=CONFIG_PATH)
+    ap.add_argument("-n", type=int, default=5, help="반복 횟수")
+    ap.add_argument("--simulate-ms", type=float, default=0, help="0 보다 크면 실제 서버 대신 이 지연(ms)으로 흉내")
+    a = ap.parse_args()
+
+    with open(a.config, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    image = cfg.get("image", "sample.jpg")
+    if not os.path.isfile(image):
+        print(json.dumps({"error": "이미지 파일을 찾지 못했습니다.", "path": image}, ensure_ascii=False), file=sys.stderr)
+        return
+    plan = main.fast_plan(cfg.get("prompt", "")) or {}
+    state = {"messages": [tool_calls_message(image, plan.get("want_weather", True), plan.get("want_address", True))]}
+
+    if a.simulate_ms > 0:
+        simulate(a.simulate_ms / 1000)
+    else:
+        # 세션 스폰/캐시 채우기가 측정에 섞이지 않도록 한 번씩 먼저 돌린다
+        await main._POOL.warmup(CAPTION_SERVER)
+        await main._POOL.warmup(EXIF_SERVER)
+    async_tools = tools_graph(main.ALL_TOOLS)
+    legacy_tools = tools_graph([legacy_caption_tool, legacy_exif_tool])
+    await async_tools.ainvoke(state)
+
+    legacy_lat, async_lat = [], []
+    for _ in range(a.n):
+        t = time.perf_counter()
+        # 기존 그래프: 루프를 막는 동기 툴을 하나씩 (ainvoke 안에서 asyncio.run 은 스레드로 돌려야 동작)
+        for call in state["messages"][0].tool_calls:
+            msg = AIMessage(content="", tool_calls=[call])
+            await asyncio.to_thread(legacy_tools.invoke, {"messages": [msg]})
+        legacy_lat.append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        out = await async_tools.ainvoke(state)
+        async_lat.append(time.perf_counter() - t)
+
+    print(json.dumps({
+        "image": image,
+        "simulate_ms": a.simulate_ms,
+        "legacy_sequential": summarize(legacy_lat),
+        "async_toolnode": summarize(async_lat),
+        "speedup": round(statistics.fmean(legacy_lat) / max(statistics.fmean(async_lat), 1e-9), 2),
+        "tools": [m.name for m in out["messages"][1:]],
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main_async())
+    finally:
+        main._POOL.close()
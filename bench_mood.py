@@ -0,0 +1,70 @@
+########################################
+# bench_mood.py (분위기 분류: 키워드별 부분 문자열 루프 vs 컴파일된 다중 패턴 엔진)
+########################################
+import json, time, random, argparse
+from utils.playlist import GENRE_TO_MOOD, GENRE_MATCHER, DEFAULT_LABEL
+from utils.playlist_search import MOOD_KEYWORDS, TEXT_MATCHER
+
+GENRES = ["K-Pop", "Pop", "Hip-Hop/Rap", "Dance", "EDM", "Alternative", "Punk Rock", "Jazz", "Lo-Fi",
+          "Emo", "Blues", "R&B/Soul", "Classical", "Ballad", "Metal", "Indie Pop", "Electronic", "Singer/Songwriter"]
+FILLER = "the of and music song lyrics video official listen album review chart week new artist".split()
+
+
+def legacy_genre_scores(genres):
+    """기존 mood_from_genres: 장르마다 GENRE_TO_MOOD 키 전체를 `in` 으로 검사"""
+    score = {"파티": 0, "신나는": 0, "격동적인": 0, "밝고경쾌": 0, "잔잔한": 0, "우울/차분": 0}
+    for g in genres:
+        g_low = g.lower()
+        for key, lab in GENRE_TO_MOOD.items():
+            if key in g_low:
+                score[lab] += 1
+    label = max(score, key=score.get)
+    return label if score[label] > 0 else DEFAULT_LABEL
+
+
+def legacy_text_scores(text):
+    """기존 방식으로 라벨 전체 점수를 내려면 키워드 수만큼 본문을 다시 훑어야 한다"""
+    low = text.lower()
+    return {label: sum(1 for kw in kws if kw in low) for label, kws in MOOD_KEYWORDS.items()}
+
+
+def make_doc(rng, words):
+    vocab = FILLER * 8 + [kw for kws in MOOD_KEYWORDS.values() for kw in kws]
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="분위기 분류 엔진 벤치마크")
+    ap.add_argument("--genres", type=int, default=1_000_000, help="장르 문자열 수")
+    ap.add_argument("--unique", type=int, default=5_000, help="서로 다른 장르 문자열 수")
+    ap.add_argument("--docs", type=int, default=200, help="문서 수")
+    ap.add_argument("--words", type=int, default=20_000, help="문서당 단어 수")
+    a = ap.parse_args()
+    rng = random.Random(0)
+
+    variants = [f"{rng.choice(GENRES)} {rng.choice(GENRES)} #{i}" for i in range(a.unique)]
+    genres = [rng.choice(variants) for _ in range(a.genres)]
+    t_old, old = timed(lambda: legacy_genre_scores(genres))
+    t_new, new = timed(lambda: GENRE_MATCHER.best(GENRE_MATCHER.total(genres)))
+
+    docs = [make_doc(rng, a.words) for _ in range(a.docs)]
+    t_old_doc, old_doc = timed(lambda: [legacy_text_scores(d) for d in docs])
+    t_new_doc, new_doc = timed(lambda: TEXT_MATCHER.scores_many(docs))
+
+    print(json.dumps({
+        "genres": {"n": len(genres), "legacy_s": round(t_old, 3), "engine_s": round(t_new, 3),
+                   "speedup": round(t_old / max(t_new, 1e-9), 1), "same_label": old == new},
+        "documents": {"n": len(docs), "mb": round(sum(map(len, docs)) / 1e6, 1),
+                      "legacy_s": round(t_old_doc, 3), "engine_s": round(t_new_doc, 3),
+                      "speedup": round(t_old_doc / max(t_new_doc, 1e-9), 1), "same_scores": old_doc == new_doc},
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+########################################
+# bench_session_pool.py (호출당 지연: 매번 스폰 vs 세션 풀)
+########################################
+import asyncio, sys, os, json, time, argparse, statistics
+from contextlib import AsyncExitStack
+from mcp.client.session import ClientSession
+from mcp.client.stdio import stdio_client, StdioServerParameters
+from utils.mcp_pool import MCPSessionPool, server_label
+
+
+def server_env():
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.getcwd() + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    env.setdefault("OPENAI_API_KEY", "sk-bench")  # caption_server 는 import 시 OpenAI 클라이언트를 만든다
+    return env
+
+
+async def spawn_call(server_py, tool, arguments):
+    """기존 main._call_mcp_tool 방식: 호출마다 프로세스 스폰 + initialize"""
+    params = StdioServerParameters(command=sys.executable, args=[server_py], cwd=os.getcwd(), env=server_env())
+    async with AsyncExitStack() as stack:
+        read, write = await stack.enter_async_context(stdio_client(params))
+        session = ClientSession(read, write)
+        await stack.enter_async_context(session)
+        await session.initialize()
+        return await session.call_tool(tool, arguments)
+
+
+def summarize(xs):
+    xs = sorted(xs)
+    return {
+        "n": len(xs),
+        "mean_ms": round(statistics.fmean(xs) * 1000, 1),
+        "p50_ms": round(xs[len(xs) // 2] * 1000, 1),
+        "p95_ms": round(xs[min(len(xs) - 1, int(len(xs) * 0.95))] * 1000, 1),
+    }
+
+
+async def main():
+    ap = argparse.ArgumentParser(description="MCP 세션 풀 벤치마크")
+    ap.add_argument("--server", default="servers/caption_server.py")
+    ap.add_argument("--tool", default="ping")
+    ap.add_argument("--args", default="{}", help="tool arguments (JSON)")
+    ap.add_argument("-n", type=int, default=10, help="호출 횟수")
+    ap.add_argument("--concurrency", type=int, default=1, help="풀 호출 동시성")
+    ap.add_argument("--inprocess", action="store_true", help="풀 세션을 in-process(메모리 스트림)로 붙임")
+    a = ap.parse_args()
+    arguments = json.loads(a.args)
+
+    spawn_lat = []
+    for _ in range(a.n):
+        t = time.perf_counter()
+        await spawn_call(a.server, a.tool, arguments)
+        spawn_lat.append(time.perf_counter() - t)
+
+    if a.inprocess:
+        os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    pool = MCPSessionPool(env=server_env(), max_sessions=a.concurrency,
+                          inprocess=[server_label(a.server)] if a.inprocess else [])
+    t = time.perf_counter()
+    await pool.warmup(a.server, a.concurrency)
+    warmup = time.perf_counter() - t
+
+    pool_lat = []
+    sem = asyncio.Semaphore(a.concurrency)
+
+    async def one():
+        async with sem:
+            t = time.perf_counter()
+            await pool.call_tool(a.server, a.tool, arguments)
+            pool_lat.append(time.perf_counter() - t)
+
+    await asyncio.gather(*[one() for _ in range(a.n)])
+    await pool.aclose()
+
+    print(json.dumps({
+        "server": a.server,
+        "tool": a.tool,
+        "spawn_per_call": summarize(spawn_lat),
+        "pool": {**summarize(pool_lat), "warmup_ms": round(warmup * 1000, 1), "inprocess": a.inprocess, **pool.stats},
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
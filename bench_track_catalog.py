@@ -0,0 +1,70 @@
+########################################
+# bench_track_catalog.py (로컬 카탈로그: 정확/퍼지 단건 vs 배치 매칭 지연)
+########################################
+import json, time, random, argparse, statistics
+from utils.track_catalog import TrackCatalog
+
+GENRES = ["K-Pop", "Pop", "Rock", "Hip-Hop/Rap", "R&B/Soul", "Ballad", "Dance", "Jazz", "Indie", "Electronic"]
+SYLLABLES = ["ka", "ro", "mi", "son", "le", "day", "blue", "night", "sun", "rain", "love", "star", "moon", "way"]
+
+
+def word(rng: random.Random, n: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(n))
+
+
+def make_rows(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [(f"{word(rng, 2).title()} {word(rng, 2).title()}", f"{word(rng, 2)} {word(rng, 3)}", rng.choice(GENRES))
+            for _ in range(n)]
+
+
+def typo(rng: random.Random, s: str) -> str:
+    i = rng.randrange(len(s))
+    return s[:i] + s[i + 1:]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="트랙 카탈로그 매칭 벤치마크")
+    ap.add_argument("--size", type=int, default=100_000, help="카탈로그 곡 수")
+    ap.add_argument("-q", type=int, default=200, help="질의 수 (절반 정확, 절반 오타)")
+    a = ap.parse_args()
+
+    rows = make_rows(a.size)
+    t = time.perf_counter()
+    cat = TrackCatalog()
+    cat.extend(rows)
+    load_s = time.perf_counter() - t
+
+    rng = random.Random(1)
+    picks = rng.sample(rows, a.q)
+    half = a.q // 2
+    exact = [(ar, ti) for ar, ti, _ in picks[:half]]
+    fuzzy = [(ar, typo(rng, ti)) for ar, ti, _ in picks[half:]]                    # 제목 오타
+    swapped = [(ti, typo(rng, ar)) for ar, ti, _ in picks[half:]]                  # "Title - Artist" + 아티스트 오타
+
+    def per_call(pairs):
+        lat = []
+        for ar, ti in pairs:
+            t = time.perf_counter()
+            cat.lookup(ar, ti)
+            lat.append(time.perf_counter() - t)
+        return round(statistics.median(lat) * 1e6, 1)
+
+    t = time.perf_counter()
+    batch = cat.lookup_many(exact + fuzzy + swapped)
+    batch_s = time.perf_counter() - t
+    want = [g for _, _, g in picks] + [g for _, _, g in picks[half:]]
+    print(json.dumps({
+        "catalog": len(cat),
+        "load_s": round(load_s, 2),
+        "exact_us_p50": per_call(exact),
+        "fuzzy_us_p50": per_call(fuzzy),
+        "swapped_us_p50": per_call(swapped[:20]),
+        "batch_us_per_query": round(batch_s / len(batch) * 1e6, 1),
+        "resolved": sum(1 for m in batch if m),
+        "genre_correct": sum(1 for m, g in zip(batch, want) if m and m[0] == g),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
-import os, sys, json, asyncio
-from contextlib import AsyncExitStack
+import os, sys, json, time, asyncio
 from typing import Optional, Dict, Any, TypedDict, List
 
 # ---------- .env 로드 ----------
@@ -18,8 +17,9 @@ from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
 
 # ---------- MCP client ----------
-from mcp.client.session import ClientSession
-from mcp.client.stdio import stdio_client, StdioServerParameters
+from utils.mcp_pool import MCPSessionPool
+from utils.fast_planner import fast_plan, normalize_prompt
+from utils.cache import DiskCache, make_key
 
 # ---------- 경로/모델/서버 ---------- .env
 CONFIG_PATH = os.environ.get("DAYLINE_CONFIG", "config.json")
@@ -28,6 +28,13 @@ EXIF_SERVER    = "servers/exif_server.py"
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL_TEXT", "gpt-4o-mini")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))  # 서버당 warm 세션 최대 개수
+MCP_CALL_TIMEOUT = 20.0  # 툴 호출 하나의 타임아웃(초)
+EXIF_LOOKUP_DEADLINE = min(float(os.getenv("EXIF_LOOKUP_DEADLINE", "5")), MCP_CALL_TIMEOUT - 5)
+DAYLINE_STREAM = os.getenv("DAYLINE_STREAM", "0") == "1"  # config.json 의 "stream" 이 우선
+# direct: Plan 대로 툴을 바로 병렬 호출 (에이전트 LLM 왕복 없음) / agent: 툴 호출 LLM 에이전트. config.json 의 "mode" 가 우선
+DAYLINE_GRAPH_MODE = os.getenv("DAYLINE_GRAPH_MODE", "direct")
+DISPATCH_MAX_ROUNDS = int(os.getenv("DISPATCH_MAX_ROUNDS", "2"))  # direct 모드: 실패한 툴 재시도 포함 최대 라운드
 
 # =========================================================
 # 공통 유틸
@@ -45,51 +52,49 @@ def _extract_payload(res):
             return {"text": c.text}
     return {"raw": str(res)}
 
-async def _call_mcp_tool(server_py: str, tool_name: str, arguments: Dict[str, Any], timeout: float = 20.0) -> Dict[str, Any]:
-    """
-    서버를 stdio로 스폰해 단일 tool 호출을 수행하고 결과 dict로 반환
-    데모 단순화를 위해 매 호출마다 스폰
-    실제 서비스는 세션 재사용 권장
-    """
+def _server_env() -> Dict[str, str]:
     env = os.environ.copy()
     # servers/ 와 utils/ 가 같은 레벨 → 루트를 PYTHONPATH에 추가
     env["PYTHONPATH"] = os.getcwd() + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
-    params = StdioServerParameters(command=sys.executable, args=[server_py], cwd=os.getcwd(), env=env) # 서브프로세스 생성
+    return env
 
-    async with AsyncExitStack() as stack:
-        read, write = await stack.enter_async_context(stdio_client(params))
-        session = ClientSession(read, write) 
-        await stack.enter_async_context(session)
-        await session.initialize()
+# 서버 스크립트별 warm 세션 풀 (caption/exif 툴이 공유)
+_POOL = MCPSessionPool(env=_server_env(), cwd=os.getcwd(), max_sessions=MCP_POOL_SIZE)
 
-        res = await asyncio.wait_for(session.call_tool(tool_name, arguments), timeout=timeout)
-        return _extract_payload(res)
+async def _call_mcp_tool(server_py: str, tool_name: str, arguments: Dict[str, Any], timeout: float = MCP_CALL_TIMEOUT) -> Dict[str, Any]:
+    """
+    세션 풀에서 warm 세션을 빌려 단일 tool 호출을 수행하고 결과 dict로 반환
+    죽은 세션은 풀이 버리고 새로 띄운다
+    """
+    res = await _POOL.call_tool(server_py, tool_name, arguments, timeout=timeout)
+    return _extract_payload(res)
 
 # =========================================================
 # LangChain Tools (LLM이 호출할 Tool 래퍼)
 # =========================================================
+# async tool: ToolNode 가 그래프의 이벤트 루프에서 await 하므로
+# 에이전트가 두 툴을 한 번에 요청하면 캡션/EXIF 가 동시에 돈다 (호출마다 asyncio.run 으로 새 루프를 만들지 않음)
+def _caption_args(path: str) -> Dict[str, Any]:
+    return {"input": {"path": path}}
+
+def _exif_args(path: str, weather: bool = True, address: bool = True) -> Dict[str, Any]:
+    # 주소/날씨 조회 마감을 MCP 호출 타임아웃보다 짧게 → 늦어도 날짜/GPS 는 받는다
+    args = {"input": {"path": path}, "deadline": EXIF_LOOKUP_DEADLINE}
+    if weather:
+        args["weather"] = {"use_open_meteo": True}
+    args["address"] = bool(address) # exif_server.py가 address 토글을 인자로 받도록 구현되어 있어야 함
+    return args
+
 @tool("caption_image_tool")
-def caption_image_tool(path: str) -> str:
+async def caption_image_tool(path: str) -> str:
     """이미지 파일 경로(path)를 받아 한 줄 캡션과 해시태그를 생성한다. 반환은 JSON 문자열."""
-    async def _run(p):
-        return await _call_mcp_tool(
-            CAPTION_SERVER,
-            "caption_image",
-            {"input": {"path": p}},
-        )
-    out = asyncio.run(_run(path))
+    out = await _call_mcp_tool(CAPTION_SERVER, "caption_image", _caption_args(path))
     return json.dumps(out, ensure_ascii=False)
 
 @tool("exif_metadata_tool")
-def exif_metadata_tool(path: str, weather: bool = True, address: bool = True) -> str:
+async def exif_metadata_tool(path: str, weather: bool = True, address: bool = True) -> str:
     """이미지 경로에서 EXIF(시간/GPS) + 옵션(날씨/주소)을 추출. 반환은 JSON 문자열."""
-    async def _run(p, w, a):
-        args = {"input": {"path": p}}
-        if w:
-            args["weather"] = {"use_open_meteo": True}
-        args["address"] = bool(a) # exif_server.py가 address 토글을 인자로 받도록 구현되어 있어야 함
-        return await _call_mcp_tool(EXIF_SERVER, "extract_image_metadata", args)
-    out = asyncio.run(_run(path, weather, address))
+    out = await _call_mcp_tool(EXIF_SERVER, "extract_image_metadata", _exif_args(path, weather, address))
     return json.dumps(out, ensure_ascii=False)
 
 ALL_TOOLS = [caption_image_tool, exif_metadata_tool]
@@ -116,8 +121,22 @@ class State(TypedDict, total=False):
 _planner_llm = ChatOpenAI(model=OPENAI_MODEL, temperature=0.0, api_key=OPENAI_API_KEY)
 Planner = _planner_llm.with_structured_output(Plan, method="function_calling")
 
+# LLM 이 정한 Plan 은 정규화한 프롬프트 기준으로 캐시 (같은 요청은 다시 묻지 않음)
+PLAN_CACHE = DiskCache("plans", max_entries=int(os.getenv("PLAN_CACHE_MAX", "5000")),
+                       ttl=float(os.getenv("PLAN_CACHE_TTL", str(30 * 24 * 3600))))
+
 def plan_node(state: State) -> Dict:
+    """
+    Plan 결정 순서: 규칙 기반(fast_plan) → 캐시 → LLM Planner (결과는 캐시에 저장)
+    """
     user_prompt = state.get("prompt") or ""
+    fast = fast_plan(user_prompt)
+    if fast is not None:
+        return {"plan": Plan(**fast).model_dump()}
+    key = make_key("plan", OPENAI_MODEL, normalize_prompt(user_prompt))
+    cached = PLAN_CACHE.get(key)
+    if cached is not None:
+        return {"plan": cached}
     sys_msg = (
         "너는 툴 라우터다. 사용자의 한국어 요청을 읽고 아래 필드를 결정해 JSON으로만 답하라.\n"
         "- need_caption: 캡션이 필요한지\n"
@@ -127,6 +146,7 @@ def plan_node(state: State) -> Dict:
         "명시가 없으면 True를 기본으로 한다."
     )
     plan: Plan = Planner.invoke([SystemMessage(content=sys_msg), HumanMessage(content=user_prompt)])
+    PLAN_CACHE.set(key, plan.model_dump())
     return {"plan": plan.model_dump()}
 
 # =========================================================
@@ -234,6 +254,37 @@ def collect_node(state: State) -> Dict:
         updates["meta"] = meta_out
     return updates
 
+# =========================================================
+# Direct dispatch (에이전트 LLM 없이 Plan 대로 툴을 바로 병렬 호출)
+# =========================================================
+async def dispatch_node(state: State) -> Dict:
+    """
+    Plan 에서 켜진 툴을 _build_agent_messages 의 call_hints 와 같은 인자로 asyncio.gather 동시 호출.
+    예외로 실패한 툴만 다음 라운드에 다시 부르고, DISPATCH_MAX_ROUNDS 라운드 후에는 있는 결과로 진행.
+    """
+    plan = state.get("plan") or {}
+    path = state.get("image_path")
+    pending: Dict[str, Any] = {}
+    if plan.get("need_caption", True):
+        pending["caption"] = (CAPTION_SERVER, "caption_image", _caption_args(path))
+    if plan.get("need_exif", True):
+        pending["meta"] = (EXIF_SERVER, "extract_image_metadata",
+                           _exif_args(path, plan.get("want_weather", True), plan.get("want_address", True)))
+
+    updates: Dict[str, Any] = {}
+    for _ in range(max(1, DISPATCH_MAX_ROUNDS)):
+        if not pending:
+            break
+        keys = list(pending)
+        outs = await asyncio.gather(*(_call_mcp_tool(*pending[k]) for k in keys), return_exceptions=True)
+        for k, out in zip(keys, outs):
+            if isinstance(out, Exception):
+                print(f"[dispatch] {k} 실패: {out!r}", file=sys.stderr)
+                continue
+            updates[k] = out
+            del pending[k]
+    return updates
+
 # =========================================================
 # 일기 작성 노드 (LLM만 사용, 툴 호출 없음)
 # =========================================================
@@ -284,21 +335,68 @@ def compose_diary_node(state: State) -> Dict:
 # =========================================================
 # 그래프 컴파일
 # =========================================================
-graph = StateGraph(State)
-graph.add_node("plan", plan_node)
-graph.add_node("agent", agent_node)
-graph.add_node("tools", tool_node)
-graph.add_node("collect", collect_node)
-graph.add_node("compose", compose_diary_node)
-
-graph.set_entry_point("plan")
-graph.add_edge("plan", "agent")
-graph.add_conditional_edges("agent", should_continue, {"tools": "tools", "agent": "agent", "collect": "collect"})
-graph.add_edge("tools", "agent")
-graph.add_edge("collect", "compose")  # ✅ 수집 후 일기 작성
-graph.add_edge("compose", END)
-
-app = graph.compile()
+# agent 모드: plan → agent(LLM 툴 호출) ⇄ tools → collect → compose
+agent_graph = StateGraph(State)
+agent_graph.add_node("plan", plan_node)
+agent_graph.add_node("agent", agent_node)
+agent_graph.add_node("tools", tool_node)
+agent_graph.add_node("collect", collect_node)
+agent_graph.add_node("compose", compose_diary_node)
+
+agent_graph.set_entry_point("plan")
+agent_graph.add_edge("plan", "agent")
+agent_graph.add_conditional_edges("agent", should_continue, {"tools": "tools", "agent": "agent", "collect": "collect"})
+agent_graph.add_edge("tools", "agent")
+agent_graph.add_edge("collect", "compose")  # ✅ 수집 후 일기 작성
+agent_graph.add_edge("compose", END)
+
+# direct 모드: plan → dispatch(툴 병렬 직접 호출) → compose  (루프 없음)
+direct_graph = StateGraph(State)
+direct_graph.add_node("plan", plan_node)
+direct_graph.add_node("dispatch", dispatch_node)
+direct_graph.add_node("compose", compose_diary_node)
+
+direct_graph.set_entry_point("plan")
+direct_graph.add_edge("plan", "dispatch")
+direct_graph.add_edge("dispatch", "compose")
+direct_graph.add_edge("compose", END)
+
+APPS = {"agent": agent_graph.compile(), "direct": direct_graph.compile()}
+app = APPS.get(DAYLINE_GRAPH_MODE, APPS["direct"])
+
+# =========================================================
+# 스트리밍 실행 (compose 노드 토큰을 도착하는 대로 출력)
+# =========================================================
+async def _stream_graph(state: State, out=sys.stderr, graph=None):
+    """
+    graph(기본 app).astream 으로 그래프를 돌리며 compose 노드의 LLM 토큰만 골라 out 에 바로 쓴다.
+    반환: (최종 state, timing) — timing 의 ttft 는 compose 시작부터 첫 토큰까지
+    """
+    t0 = time.perf_counter()
+    t_compose = None
+    t_first = None
+    final: Dict[str, Any] = {}
+    async for mode, chunk in (graph or app).astream(state, stream_mode=["messages", "updates", "values"]):
+        if mode == "values":
+            final = chunk
+        elif mode == "updates":
+            if "collect" in chunk or "dispatch" in chunk:  # 수집이 끝나면 바로 compose 가 시작된다
+                t_compose = time.perf_counter()
+        else:
+            msg, meta = chunk
+            if meta.get("langgraph_node") != "compose" or not msg.content:
+                continue
+            if t_first is None:
+                t_first = time.perf_counter()
+            print(msg.content, end="", file=out, flush=True)
+    print(file=out)
+    t_end = time.perf_counter()
+    timing = {
+        "total_s": round(t_end - t0, 3),
+        "ttft_s": round(t_first - (t_compose or t0), 3) if t_first else None,
+        "compose_s": round(t_end - (t_compose or t0), 3),
+    }
+    return final, timing
 
 # =========================================================
 # 메인 실행
@@ -321,12 +419,21 @@ async def _run_from_config():
         print(json.dumps({"error": "이미지 파일을 찾지 못했습니다.", "path": image_path}, ensure_ascii=False), file=sys.stderr)
         return
 
+    mode = cfg.get("mode", DAYLINE_GRAPH_MODE)
+    if mode not in APPS:
+        print(json.dumps({"error": "알 수 없는 mode 입니다.", "mode": mode, "choices": list(APPS)}, ensure_ascii=False), file=sys.stderr)
+        return
+
     state: State = {
         "image_path": image_path,
         "prompt": user_prompt,
         "messages": []
     }
-    result = await app.ainvoke(state)
+    if cfg.get("stream", DAYLINE_STREAM):
+        result, timing = await _stream_graph(state, graph=APPS[mode])
+        print(f"[timing] {json.dumps(timing)}", file=sys.stderr)
+    else:
+        result = await APPS[mode].ainvoke(state)
 
     out = {
         "plan": result.get("plan"),
@@ -337,4 +444,7 @@ async def _run_from_config():
     print(json.dumps(out, ensure_ascii=False, indent=2))
 
 if __name__ == "__main__":
-    asyncio.run(_run_from_config())
+    try:
+        asyncio.run(_run_from_config())
+    finally:
+        _POOL.close()
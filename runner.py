@@ -2,9 +2,7 @@
 # runner.py (여러 MCP 서버를 동시에 붙여 호출하는 오케스트레이터)
 ########################################
 import asyncio, sys, os, json
-from contextlib import AsyncExitStack
-from mcp.client.session import ClientSession
-from mcp.client.stdio import stdio_client, StdioServerParameters
+from utils.mcp_startup import ServerManager, required_servers
 
 USE_TEXT_PLAYLIST = True  # ← 텍스트 기반 플레이리스트 사용 시 True
 
@@ -21,24 +19,13 @@ def extract_payload(res):
             return {"text": c.text}
     return {"raw": str(res)}
 
-async def spawn(stack: AsyncExitStack, path: str) -> ClientSession:
-    params = StdioServerParameters(command=sys.executable, args=[path], cwd=os.getcwd(), env=os.environ.copy())
-    read, write = await stack.enter_async_context(stdio_client(params))
-    sess = ClientSession(read, write)
-    await stack.enter_async_context(sess)
-    await sess.initialize()
-    return sess
-
 async def main():
-    async with AsyncExitStack() as stack:
-        # 서버 프로세스 각각 띄우기
-        caption = await spawn(stack, "servers/caption_server.py")
-        playlist = await spawn(stack, "servers/playlist_server.py")
-        trackinfo = await spawn(stack, "servers/trackinfo_server.py")
-        mbti = await spawn(stack, "servers/mbti_server.py")
-        diary = await spawn(stack, "servers/diary_server.py")
-        exif = await spawn(stack, "servers/exif_server.py")
-        synth = await spawn(stack, "servers/synth_server.py")
+    async with ServerManager(env=os.environ.copy()) as servers:
+        # 이번 실행이 실제로 호출하는 서버만 병렬 기동 (주석 처리된 단계를 켜면 입력도 함께 넘길 것)
+        servers.start(required_servers(image="bom.jpeg"))
+        caption = await servers.get("caption", required=True)
+        exif = await servers.get("exif", required=True)
+        synth = await servers.get("synth", required=True)
 
         # 1) 이미지 캡션 & 메타
         cap = extract_payload(await caption.call_tool("caption_image", {"input": {"path": "bom.jpeg"}}))
@@ -50,6 +37,7 @@ async def main():
 
         # # 2) 플레이리스트 분석 (텍스트 or 숫자 피처)
         # if USE_TEXT_PLAYLIST:
+        #     trackinfo = await servers.get("trackinfo", required=True)
         #     pl_text = extract_payload(await trackinfo.call_tool(
         #         "resolve_text_playlist",
         #         {"input": {"lines": [
@@ -60,6 +48,7 @@ async def main():
         #     ))
         #     playlist_for_synth = None  # 필요 시 변환
         # else:
+        #     playlist = await servers.get("playlist", required=True)
         #     pl_stats = extract_payload(await playlist.call_tool(
         #         "analyze_playlist",
         #         {"input": {"tracks": [
@@ -70,9 +59,11 @@ async def main():
         #     playlist_for_synth = pl_stats
 
         # # 3) MBTI
+        # mbti = await servers.get("mbti", required=True)
         # m = extract_payload(await mbti.call_tool("infer_mbti_traits", {"input": {"mbti": "ENFP"}}))
 
         # # 4) 일기 요약
+        # diary = await servers.get("diary", required=True)
         # d = extract_payload(await diary.call_tool("summarize_diary", {"input": {"text": "오늘 가족들과 여수 여행~! 오랜만에 봄이도 함께해서 너무 좋았음.", "language": "ko"}}))
 
         # 5) 최종 합성
@@ -86,6 +77,7 @@ async def main():
             # "target_chars": 14
         }}))
 
+        print(servers.report(), file=sys.stderr)
         print("✅ 최종 요약:", final.get("line"))
 
 if __name__ == "__main__":
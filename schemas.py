@@ -39,21 +39,44 @@ class ExtractedMeta(BaseModel):
     gps: Optional[Dict[str, float]] = None
     address: Optional[str] = None
     weather: Optional[Dict[str, Any]] = None
+    timed_out: List[str] = []   # 마감 시간 안에 못 끝난 조회 ("address", "weather")
 
 class CaptionResult(BaseModel):
     caption: str
     tags: List[str] = []
 
+class BatchCaptionItem(BaseModel):
+    index: int
+    path: Optional[str] = None
+    result: Optional[CaptionResult] = None
+    error: Optional[str] = None
+
+class BatchCaptionResult(BaseModel):
+    items: List[BatchCaptionItem]
+    ok: int
+    failed: int
+
 class PlaylistMoodResult(BaseModel):
     label: Literal["잔잔한","신나는","격동적인","파티","우울/차분","밝고경쾌"]
     summary: str
     stats: Dict[str, float]
 
+class BatchPlaylistItem(BaseModel):
+    index: int
+    spotify_url: Optional[str] = None
+    result: Optional[PlaylistMoodResult] = None
+    error: Optional[str] = None
+
+class BatchPlaylistResult(BaseModel):
+    items: List[BatchPlaylistItem]
+    ok: int
+    failed: int
+
 class TrackInfo(BaseModel):
     title: str
     artist: Optional[str] = None
     genre: Optional[str] = None
-    source: Optional[str] = None  # itunes/musicbrainz
+    source: Optional[str] = None  # catalog/itunes/musicbrainz
     confidence: float = 0.0
 
 class TextPlaylistMoodResult(BaseModel):
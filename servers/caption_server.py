@@ -1,38 +1,59 @@
 ########################################
 # servers/caption_server.py (이미지 캡션 전용)
 ########################################
-import os, io, base64
-from typing import Optional
-from fastmcp import FastMCP
+import os, json, asyncio, hashlib
+from typing import Optional, Dict, Any, List
+from fastmcp import FastMCP, Context
 from dotenv import load_dotenv
-from openai import OpenAI
-from PIL import Image
-from schemas import ImageInput, CaptionResult
+from openai import OpenAI, AsyncOpenAI
+from schemas import ImageInput, CaptionResult, BatchCaptionItem, BatchCaptionResult
+from utils.cache import DiskCache, make_key
+from utils.image_prep import to_jpeg_data_url
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+aclient = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))  # 배치 캡션용
 MODEL_VISION = os.getenv("OPENAI_MODEL_VISION", "gpt-4o-mini")
 OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
 MAX_SIDE = int(os.getenv("CAPTION_MAX_SIDE", "1280"))
+CAPTION_PROMPT = "사진을 한 문장으로 묘사하고, 해시태그 5개를 한국어로."
+CAPTION_TEMPERATURE = 0.2
+CAPTION_CONCURRENCY = int(os.getenv("CAPTION_CONCURRENCY", "4"))  # 배치: 동시 vision 요청 수
+PREP_WORKERS = int(os.getenv("CAPTION_PREP_WORKERS", str(os.cpu_count() or 4)))  # 배치: 동시 전처리 수
+# 같은 사진 재요청 시 API 호출 없이 반환 (이미지 내용 해시 + 모델/프롬프트/MAX_SIDE 기준)
+CAPTION_CACHE = DiskCache(
+    "caption",
+    max_entries=int(os.getenv("CAPTION_CACHE_MAX", "5000")),
+    ttl=float(os.getenv("CAPTION_CACHE_TTL", str(30 * 24 * 3600))),
+)
 app = FastMCP("caption-mcp")
 
 
+def _image_digest(path: Optional[str], data_url: Optional[str]) -> str:
+    """이미지 원본 바이트(또는 data_url 문자열)의 sha256"""
+    h = hashlib.sha256()
+    if data_url:
+        h.update(data_url.encode("utf-8"))
+    elif path:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    else:
+        raise ValueError("path 또는 data_url 중 하나는 필요")
+    return h.hexdigest()
+
+
+def _caption_key(digest: str) -> str:
+    return make_key(digest, MODEL_VISION, CAPTION_PROMPT, CAPTION_TEMPERATURE, MAX_SIDE)
+
+
 def _to_data_url(path: Optional[str], data_url: Optional[str]) -> str:
     if data_url:
         return data_url
     if not path:
         raise ValueError("path 또는 data_url 중 하나는 필요")
-    with Image.open(path) as im:
-        im = im.convert("RGB")
-        w, h = im.size
-        m = max(w, h)
-        if m > MAX_SIDE:
-            scale = MAX_SIDE / m
-            im = im.resize((int(w * scale), int(h * scale)))
-        buf = io.BytesIO()
-        im.save(buf, format="JPEG", quality=85, optimize=True)
-    b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-    return f"data:image/jpeg;base64,{b64}"
+    # 축소 디코드 + EXIF 방향 보정 (utils/image_prep.py)
+    return to_jpeg_data_url(path, MAX_SIDE)
 
 
 @app.tool()
@@ -41,23 +62,110 @@ def ping() -> str:
 
 
 @app.tool()
-def caption_image(input: ImageInput) -> CaptionResult:
-    url = _to_data_url(input.path, input.data_url)
+def caption_cache_stats() -> Dict[str, Any]:
+    """캡션 캐시 적중/미스 카운터와 크기"""
+    return CAPTION_CACHE.stats()
+
+
+def _vision_messages(url: str) -> List[Dict[str, Any]]:
     content = [
-        {"type": "text", "text": "사진을 한 문장으로 묘사하고, 해시태그 5개를 한국어로."},
+        {"type": "text", "text": CAPTION_PROMPT},
         {"type": "image_url", "image_url": {"url": url}},
     ]
+    return [{"role": "user", "content": content}]
+
+
+def _parse_caption(txt: str) -> CaptionResult:
+    parts = txt.strip().split("#")
+    caption = parts[0].strip()
+    tags = [p.strip().replace("#", "") for p in parts[1:]] if len(parts) > 1 else []
+    return CaptionResult(caption=caption or "설명 없음", tags=tags[:5])
+
+
+@app.tool()
+def caption_image(input: ImageInput) -> CaptionResult:
+    key = _caption_key(_image_digest(input.path, input.data_url))
+    hit = CAPTION_CACHE.get(key)
+    if hit is not None:
+        return CaptionResult(**hit)
+
+    url = _to_data_url(input.path, input.data_url)
     resp = client.chat.completions.create(
         model=MODEL_VISION,
-        messages=[{"role": "user", "content": content}],
-        temperature=0.2,
+        messages=_vision_messages(url),
+        temperature=CAPTION_TEMPERATURE,
         timeout=OPENAI_TIMEOUT,
     )
-    txt = resp.choices[0].message.content.strip()
-    parts = txt.split("#")
-    caption = parts[0].strip()
-    tags = [p.strip().replace("#", "") for p in parts[1:]] if len(parts) > 1 else []
-    return CaptionResult(caption=caption or "설명 없음", tags=tags[:5])
+    result = _parse_caption(resp.choices[0].message.content)
+    CAPTION_CACHE.set(key, result.model_dump())
+    return result
+
+
+@app.tool()
+async def caption_images(
+    inputs: List[ImageInput],
+    concurrency: int = CAPTION_CONCURRENCY,
+    ordered: bool = True,
+    ctx: Context = None,
+) -> BatchCaptionResult:
+    """
+    여러 이미지를 한 번에 캡션. 전처리는 스레드에서 병렬, vision 요청은 concurrency 개까지 동시.
+    - 한 장이 실패해도 그 항목만 error 로 남기고 나머지는 계속
+    - 진행 알림(progress)의 message 로 항목 결과(JSON)를 흘려보냄
+      ordered=True 면 입력 순서대로, False 면 끝나는 대로
+    """
+    prep_sem = asyncio.Semaphore(max(1, PREP_WORKERS))
+    api_sem = asyncio.Semaphore(max(1, concurrency))
+    # 전처리가 API 보다 빠르므로 대기 중인 data URL 이 쌓이지 않게 전체 진행 개수도 묶는다
+    inflight = asyncio.Semaphore(max(1, concurrency) + max(1, PREP_WORKERS))
+    total = len(inputs)
+
+    async def one(i: int, inp: ImageInput) -> BatchCaptionItem:
+        async with inflight:
+            return await _one(i, inp)
+
+    async def _one(i: int, inp: ImageInput) -> BatchCaptionItem:
+        try:
+            async with prep_sem:
+                key = _caption_key(await asyncio.to_thread(_image_digest, inp.path, inp.data_url))
+                hit = CAPTION_CACHE.get(key)
+                if hit is not None:
+                    return BatchCaptionItem(index=i, path=inp.path, result=CaptionResult(**hit))
+                url = await asyncio.to_thread(_to_data_url, inp.path, inp.data_url)
+            async with api_sem:
+                resp = await aclient.chat.completions.create(
+                    model=MODEL_VISION,
+                    messages=_vision_messages(url),
+                    temperature=CAPTION_TEMPERATURE,
+                    timeout=OPENAI_TIMEOUT,
+                )
+            result = _parse_caption(resp.choices[0].message.content)
+            CAPTION_CACHE.set(key, result.model_dump())
+            return BatchCaptionItem(index=i, path=inp.path, result=result)
+        except Exception as e:
+            return BatchCaptionItem(index=i, path=inp.path, error=f"{type(e).__name__}: {e}")
+
+    items: List[Optional[BatchCaptionItem]] = [None] * total
+    sent = 0  # ordered 모드: 여기까지 연속으로 흘려보냄
+
+    async def emit(item: BatchCaptionItem, done: int):
+        if ctx is not None:
+            await ctx.report_progress(done, total, message=json.dumps(item.model_dump(), ensure_ascii=False))
+
+    done = 0
+    for fut in asyncio.as_completed([one(i, inp) for i, inp in enumerate(inputs)]):
+        item = await fut
+        items[item.index] = item
+        done += 1
+        if not ordered:
+            await emit(item, done)
+            continue
+        while sent < total and items[sent] is not None:
+            await emit(items[sent], sent + 1)
+            sent += 1
+
+    ok = sum(1 for it in items if it and it.result is not None)
+    return BatchCaptionResult(items=items, ok=ok, failed=total - ok)
 
 
 if __name__ == "__main__":
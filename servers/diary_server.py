@@ -2,29 +2,34 @@
 # servers/diary_server.py (일기 요약/감정 전용)
 ########################################
 import os
+from typing import Dict, Any
 from fastmcp import FastMCP
 from dotenv import load_dotenv
 from openai import OpenAI
 from FinalProject.schemas import DiaryInput, DiarySummary
+from utils.llm_cache import LLMCache, cached_chat
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MODEL_TEXT = os.getenv("OPENAI_MODEL_TEXT","gpt-4o-mini")
 app = FastMCP("diary-mcp")
+LLM_CACHE = LLMCache("llm")
 
 
 @app.tool()
-def summarize_diary(input: DiaryInput) -> DiarySummary:
+def summarize_diary(input: DiaryInput, no_cache: bool = False) -> DiarySummary:
+    """no_cache=True 면 응답 캐시를 건너뛰고 새로 생성 (결과로 캐시 갱신)"""
     sys = "당신은 섬세한 감정 분석가입니다. 핵심 사건 3~5개를 불릿으로, 감정은 한 단어(한국어)."
-    resp = client.chat.completions.create(
+    text = cached_chat(
+        client, LLM_CACHE,
         model=MODEL_TEXT,
         messages=[
             {"role":"system","content":sys},
             {"role":"user","content":f"원문({input.language}):{input.text}"}
         ],
         temperature=0.2,
-    )
-    text = resp.choices[0].message.content.strip()
+        no_cache=no_cache,
+    ).strip()
     bullets = [ln[1:].strip() for ln in text.splitlines() if ln.strip().startswith("-")]
     mood = "중립"
     for ln in text.splitlines():
@@ -36,5 +41,11 @@ def summarize_diary(input: DiaryInput) -> DiarySummary:
     return DiarySummary(bullet=bullets[:5], mood=mood)
 
 
+@app.tool()
+def llm_cache_stats() -> Dict[str, Any]:
+    """LLM 응답 캐시 적중률 (메모리/디스크)"""
+    return LLM_CACHE.stats()
+
+
 if __name__ == "__main__":
     app.run()
\ No newline at end of file
@@ -1,42 +1,83 @@
 # servers/exif_server.py
 from fastmcp import FastMCP
 # --- project-root import bootstrap ---
-import sys, os
+import sys, os, asyncio
 _ROOT = os.path.dirname(os.path.dirname(__file__))
 if _ROOT not in sys.path:
     sys.path.insert(0, _ROOT)
 # --- end bootstrap ---
 
+from typing import Dict, Any, List, Optional
 from schemas import ImageInput, WeatherLookupInput, ExtractedMeta
-from utils.exif_geo import extract_exif_meta, lookup_weather, reverse_geocode
+from utils.exif_geo import (
+    extract_exif_meta, lookup_weather, lookup_weather_batch, reverse_geocode,
+    geocode_cache_stats, weather_cache_stats,
+)
+from utils.http import http_stats
 
 app = FastMCP("exif-mcp")
 
+# 주소+날씨 조회 공동 마감(초). 클라이언트 호출 타임아웃(smart_client 기본 8초)보다 충분히 짧게:
+# 부분 결과가 타임아웃 뒤에 도착하면 날짜/GPS 까지 통째로 버려진다. 호출자는 deadline 으로 덮어쓴다.
+EXIF_LOOKUP_DEADLINE = float(os.getenv("EXIF_LOOKUP_DEADLINE", "5"))
+
 @app.tool()
-def extract_image_metadata(
+async def extract_image_metadata(
     input: ImageInput,
     weather: WeatherLookupInput = WeatherLookupInput(),
     address: bool = True,
+    deadline: Optional[float] = None,
 ) -> ExtractedMeta:
+    """
+    EXIF 날짜/GPS + (GPS 가 있으면) 주소/날씨.
+    주소와 날씨는 동시에 조회하고 deadline(초, 기본 EXIF_LOOKUP_DEADLINE) 안에 못 끝난 쪽은
+    비워 두고 timed_out 에 이름을 남긴다. (늦게 끝난 조회도 캐시는 채우므로 다음 호출에 쓰인다)
+    """
     if not input.path:
         raise ValueError("메타데이터 추출은 파일 경로(path)가 필요")
-    base = extract_exif_meta(input.path)
+    base = await asyncio.to_thread(extract_exif_meta, input.path)
 
-    wx = None
-    addr = None
+    jobs: Dict[str, asyncio.Task] = {}
     if base.get("gps"):
         lat = base["gps"]["lat"]; lon = base["gps"]["lon"]
         if address:
-            addr = reverse_geocode(lat, lon, lang="ko")
+            jobs["address"] = asyncio.create_task(asyncio.to_thread(reverse_geocode, lat, lon, "ko"))
         if weather.use_open_meteo:
-            wx = lookup_weather(lat, lon, base.get("datetime"))
+            jobs["weather"] = asyncio.create_task(asyncio.to_thread(lookup_weather, lat, lon, base.get("datetime")))
+
+    results: Dict[str, Any] = {}
+    timed_out: List[str] = []
+    if jobs:
+        limit = EXIF_LOOKUP_DEADLINE if deadline is None else deadline
+        await asyncio.wait(jobs.values(), timeout=max(0.0, limit))
+        for name, task in jobs.items():
+            if not task.done():
+                task.cancel()
+                timed_out.append(name)
+            elif task.exception() is None:
+                results[name] = task.result()
 
     return ExtractedMeta(
         datetime=base.get("datetime"),
         gps=base.get("gps"),
-        address=addr,
-        weather=wx
+        address=results.get("address"),
+        weather=results.get("weather"),
+        timed_out=timed_out,
     )
 
+@app.tool()
+def lookup_weather_points(points: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    여러 지점/날짜의 날씨를 한 번에 조회.
+    points: [{"lat": 37.5, "lon": 127.0, "datetime": "2024:05:01 12:00:00"}, ...] (datetime 생략 시 오늘)
+    결과는 입력 순서 그대로, 실패 항목은 None.
+    """
+    return lookup_weather_batch([(p["lat"], p["lon"], p.get("datetime")) for p in points])
+
+@app.tool()
+def lookup_cache_stats() -> Dict[str, Any]:
+    """주소/날씨 조회 캐시 적중률/요청 합치기 통계 + HTTP 커넥션 재사용 통계"""
+    return {"geocode": geocode_cache_stats(), "weather": weather_cache_stats(), "http": http_stats()}
+
 if __name__ == "__main__":
     app.run()
@@ -1,15 +1,18 @@
+from typing import Optional, Dict, Any
 from mcp.server.fastmcp import FastMCP
 from FinalProject.schemas import PlaylistMoodResult
-from utils.playlist_search import analyze_textfile_tracks
+from utils.playlist_search import analyze_textfile_tracks, mood_cache_stats
 
 app = FastMCP("playlist-search-mcp")
 
 @app.tool()
-def analyze_playlist_textfile(path: str) -> PlaylistMoodResult:
+def analyze_playlist_textfile(path: str, deadline: Optional[float] = None, limit: Optional[int] = None) -> PlaylistMoodResult:
     """
     텍스트 파일 (예: "가수 - 곡명") 목록을 읽고, 웹 검색으로 각 곡 분위기를 추론하여 전체 mood 요약.
+    deadline(초)을 주면 그 안에 끝난 앞쪽 곡들만으로 요약 (stats["partial"]=1), limit 은 앞에서부터 곡 수 제한.
     """
-    tracks = analyze_textfile_tracks(path)
+    state = {}
+    tracks = analyze_textfile_tracks(path, deadline=deadline, limit=limit, state=state)
     # mood 카운트 기반 다수결
     counter = {}
     for t in tracks:
@@ -19,8 +22,16 @@ def analyze_playlist_textfile(path: str) -> PlaylistMoodResult:
     else:
         label = "잔잔한"
     summary = ", ".join([f"{t['artist']} - {t['title']} ({t['mood']})" for t in tracks[:5]])
-    stats = {"total":len(tracks),"labels":counter}
+    # stats 는 Dict[str, float] → 라벨별 개수는 "labels.<라벨>" 키로 펼친다
+    stats = {"total": float(len(tracks)), **{f"labels.{k}": float(v) for k, v in counter.items()}}
+    if not state.get("complete"):
+        stats["partial"] = 1.0
     return PlaylistMoodResult(label=label, summary=summary, stats=stats)
 
+@app.tool()
+def song_mood_cache_stats() -> Dict[str, Any]:
+    """곡별 분위기 캐시 적중률/크기"""
+    return mood_cache_stats()
+
 if __name__ == "__main__":
     app.run()
@@ -1,47 +1,105 @@
 ########################################
 # servers/playlist_server.py (플레이리스트 경향성 — 숫자 피처 or Spotify)
 ########################################
-import os
+import os, asyncio
+from typing import List, Dict, Any, Optional
 from fastmcp import FastMCP
-from FinalProject.schemas import PlaylistInput, PlaylistMoodResult
-from utils.playlist import summarize_features, label_mood
+from FinalProject.schemas import PlaylistInput, PlaylistMoodResult, BatchPlaylistItem, BatchPlaylistResult
+from utils.playlist import summarize_features, label_mood, analyze_feature_sets
+from utils.spotify import playlist_features, feature_cache_stats
 
 app = FastMCP("playlist-mcp")
 
+PLAYLIST_CONCURRENCY = int(os.getenv("PLAYLIST_CONCURRENCY", "4"))  # analyze_playlists: 동시에 가져올 Spotify 플레이리스트 수
 
-@app.tool()
-def analyze_playlist(input: PlaylistInput) -> PlaylistMoodResult:
+
+def _summary(stats: Dict[str, float]) -> str:
+    return f"에너지 {stats['energy']:.2f}, 발란스 {stats['valence']:.2f}, 댄서빌리티 {stats['danceability']:.2f}, 템포 {stats['tempo']:.0f}"
+
+
+def _spotify_client():
+    import spotipy
+    from spotipy.oauth2 import SpotifyClientCredentials
+    return spotipy.Spotify(auth_manager=SpotifyClientCredentials(client_id=os.getenv("SPOTIFY_CLIENT_ID"), client_secret=os.getenv("SPOTIFY_CLIENT_SECRET")))
+
+
+def _input_tracks(input: PlaylistInput, sp=None) -> List[Dict[str, Any]]:
     tracks = input.tracks or []
     if input.spotify_url and not tracks:
         try:
-            import spotipy
-            from spotipy.oauth2 import SpotifyClientCredentials
-            sp = spotipy.Spotify(auth_manager=SpotifyClientCredentials(client_id=os.getenv("SPOTIFY_CLIENT_ID"), client_secret=os.getenv("SPOTIFY_CLIENT_SECRET")))
-            pl_id = input.spotify_url.split("playlist/")[-1].split("?")[0]
-            items = sp.playlist_items(pl_id, additional_types=['track'])
-            ids = [it['track']['id'] for it in items['items'] if it.get('track') and it['track'].get('id')]
-            feats = sp.audio_features(ids)
-            tracks = []
-            for tid, f in zip(ids, feats):
-                if not f:
-                    continue
-                tr = sp.track(tid)
-                tracks.append({
-                    "name": tr['name'],
-                    "artist": ", ".join(a['name'] for a in tr['artists']),
-                    "energy": f["energy"],
-                    "valence": f["valence"],
-                    "danceability": f["danceability"],
-                    "tempo": f["tempo"],
-                })
+            tracks = playlist_features(sp or _spotify_client(), input.spotify_url)
         except Exception as e:
             raise RuntimeError(f"Spotify 조회 실패: {e}")
+    return tracks
+
+
+@app.tool()
+def analyze_playlist(input: PlaylistInput) -> PlaylistMoodResult:
+    tracks = _input_tracks(input)
     if not tracks:
         raise ValueError("트랙 피처가 없습니다.")
     stats = summarize_features(tracks)
     label = label_mood(stats)
-    summary = f"에너지 {stats['energy']:.2f}, 발란스 {stats['valence']:.2f}, 댄서빌리티 {stats['danceability']:.2f}, 템포 {stats['tempo']:.0f}"
-    return PlaylistMoodResult(label=label, summary=summary, stats=stats)
+    return PlaylistMoodResult(label=label, summary=_summary(stats), stats=stats)
+
+
+@app.tool()
+async def analyze_playlists(inputs: List[PlaylistInput]) -> BatchPlaylistResult:
+    """
+    여러 플레이리스트를 한 번에 분석 (배치 작업용). 결과는 입력 순서 그대로.
+    - Spotify 입력은 클라이언트 하나로 PLAYLIST_CONCURRENCY 개씩 동시에 가져온다
+    - 조회 실패/빈 플레이리스트는 그 항목만 error 로 남기고 나머지는 계속
+    - 평균/규칙 판정은 utils.playlist.analyze_feature_sets 가 성공한 전체를 한 번에 NumPy 로 계산
+    """
+    playlists: List[List[Dict[str, Any]]] = [[] for _ in inputs]
+    errors: List[Optional[str]] = [None] * len(inputs)
+
+    remote = []
+    for i, inp in enumerate(inputs):
+        if inp.spotify_url and not inp.tracks:
+            remote.append(i)
+        else:
+            playlists[i] = inp.tracks or []
+    if remote:
+        sp = None
+        try:
+            sp = _spotify_client()
+        except Exception as e:
+            for i in remote:
+                errors[i] = f"Spotify 조회 실패: {e}"
+        if sp is not None:
+            sem = asyncio.Semaphore(max(1, PLAYLIST_CONCURRENCY))
+
+            async def fetch(i: int):
+                async with sem:
+                    try:
+                        playlists[i] = await asyncio.to_thread(_input_tracks, inputs[i], sp)
+                    except Exception as e:
+                        errors[i] = str(e)
+
+            await asyncio.gather(*(fetch(i) for i in remote))
+
+    for i, p in enumerate(playlists):
+        if not p and errors[i] is None:
+            errors[i] = "트랙 피처가 없습니다."
+    good = [i for i in range(len(inputs)) if errors[i] is None]
+    analyzed = dict(zip(good, analyze_feature_sets([playlists[i] for i in good]))) if good else {}
+
+    items = []
+    for i, inp in enumerate(inputs):
+        if i in analyzed:
+            label, stats = analyzed[i]
+            items.append(BatchPlaylistItem(index=i, spotify_url=inp.spotify_url,
+                                           result=PlaylistMoodResult(label=label, summary=_summary(stats), stats=stats)))
+        else:
+            items.append(BatchPlaylistItem(index=i, spotify_url=inp.spotify_url, error=errors[i]))
+    return BatchPlaylistResult(items=items, ok=len(good), failed=len(inputs) - len(good))
+
+
+@app.tool()
+def spotify_cache_stats() -> Dict[str, Any]:
+    """Spotify 오디오 피처 캐시 적중률/크기"""
+    return feature_cache_stats()
 
 
 if __name__ == "__main__":
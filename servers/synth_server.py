@@ -1,21 +1,34 @@
 ########################################
 # servers/synth_server.py (최종 10~20자 요약 전용)
 ########################################
-import os, json
-from fastmcp import FastMCP
+import os, json, asyncio
+from typing import Dict, Any
+from fastmcp import FastMCP, Context
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from FinalProject.schemas import DaylineInput, DaylineOutput
 from utils.style import style_tokens
+from utils.llm_cache import LLMCache, cached_chat, cached_chat_stream
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+aclient = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))  # stream=True 경로
 MODEL_TEXT = os.getenv("OPENAI_MODEL_TEXT","gpt-4o-mini")
 app = FastMCP("synth-mcp")
+LLM_CACHE = LLMCache("llm")
 
 
 @app.tool()
-def synthesize_dayline(input: DaylineInput) -> DaylineOutput:
+async def synthesize_dayline(
+    input: DaylineInput,
+    no_cache: bool = False,
+    stream: bool = False,
+    ctx: Context = None,
+) -> DaylineOutput:
+    """
+    no_cache=True 면 응답 캐시를 건너뛰고 새로 생성 (결과로 캐시 갱신)
+    stream=True 면 생성되는 토큰 조각을 MCP progress 알림(message=조각)으로 먼저 흘려보낸다
+    """
     style = style_tokens(
         age=input.persona.age if input.persona else None,
         gender=input.persona.gender if input.persona else None,
@@ -35,10 +48,29 @@ def synthesize_dayline(input: DaylineInput) -> DaylineOutput:
         "문체는 style 토큰을 반영한다. 제공된 데이터만 사용하라."
     )
     user = "아래 JSON을 종합해 10~20자 요약 1개만 출력. 줄바꿈/해설 금지." + json.dumps(payload, ensure_ascii=False)
-    resp = client.chat.completions.create(model=MODEL_TEXT, messages=[{"role":"system","content":sys},{"role":"user","content":user}], temperature=0.5)
-    line = resp.choices[0].message.content.strip().replace(""," ")
+    messages = [{"role":"system","content":sys},{"role":"user","content":user}]
+    if stream and ctx is not None:
+        sent = 0
+
+        async def on_delta(delta: str):
+            nonlocal sent
+            sent += 1
+            await ctx.report_progress(sent, None, message=delta)
+
+        text = await cached_chat_stream(aclient, LLM_CACHE, model=MODEL_TEXT, messages=messages, temperature=0.5,
+                                        on_delta=on_delta, no_cache=no_cache)
+    else:
+        text = await asyncio.to_thread(cached_chat, client, LLM_CACHE, model=MODEL_TEXT, messages=messages,
+                                       temperature=0.5, no_cache=no_cache)
+    line = text.strip().replace(""," ")
     return DaylineOutput(line=line)
 
 
+@app.tool()
+def llm_cache_stats() -> Dict[str, Any]:
+    """LLM 응답 캐시 적중률 (메모리/디스크)"""
+    return LLM_CACHE.stats()
+
+
 if __name__ == "__main__":
     app.run()
\ No newline at end of file
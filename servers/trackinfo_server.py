@@ -1,40 +1,154 @@
 ########################################
 # servers/trackinfo_server.py (텍스트 플레이리스트 전용)
 ########################################
-from fastmcp import FastMCP
+import os, json, asyncio
+from collections import Counter, deque
+from typing import Dict, Any, Iterator, AsyncIterator, Optional
+from fastmcp import FastMCP, Context
 from FinalProject.schemas import TextPlaylistInput, TextPlaylistMoodResult, TrackInfo
-from utils.track_lookup import parse_line, itunes_genre, mb_genre
-from utils.playlist import mood_from_genres
+from utils.track_lookup import parse_line, itunes_genre, mb_genre, cached_track, store_track, track_cache_stats
+from utils.http import http_stats
+from utils.track_catalog import get_catalog
+from utils.playlist import mood_from_genre_counts
 
 app = FastMCP("trackinfo-mcp")
 
+# 업스트림별 동시 요청 한도 (MusicBrainz 는 track_lookup.MB_LIMITER 가 초당 횟수도 제한)
+ITUNES_CONCURRENCY = int(os.getenv("ITUNES_CONCURRENCY", "8"))
+MB_CONCURRENCY = int(os.getenv("MB_CONCURRENCY", "1"))
+TRACK_WINDOW = int(os.getenv("TRACK_WINDOW", "64"))        # 한 번에 읽어 카탈로그 매칭/예약하는 줄 수
+PROGRESS_EVERY = int(os.getenv("TRACK_PROGRESS_EVERY", "50"))
+
+
+async def _resolve_line(ln: str, itunes_sem: asyncio.Semaphore, mb_sem: asyncio.Semaphore) -> TrackInfo:
+    artist, title = parse_line(ln)
+    hit = cached_track(artist, title)
+    if hit is not None:
+        return TrackInfo(title=title or ln, artist=artist or None, genre=hit["genre"] or None,
+                         source=hit["source"], confidence=hit["confidence"])
+    failed = False
+    try:
+        async with itunes_sem:
+            g, conf = await asyncio.to_thread(itunes_genre, artist, title)
+    except Exception:
+        g, conf, failed = "", 0.0, True
+    src = "itunes"
+    if not g:
+        # iTunes 가 비었을 때만 MusicBrainz 대기열에 들어간다
+        try:
+            async with mb_sem:
+                g2, conf2 = await asyncio.to_thread(mb_genre, artist, title)
+        except Exception:
+            g2, conf2, failed = "", 0.0, True
+        if g2:
+            g, conf, src = g2, conf2, "musicbrainz"
+    if g or not failed:
+        # 네트워크 오류로 못 찾은 건 기억하지 않는다 (진짜 '없음'만 짧게 캐시)
+        store_track(artist, title, g, src, conf)
+    return TrackInfo(title=title or ln, artist=artist or None, genre=g or None, source=src, confidence=float(conf))
+
+
+def _iter_lines(input: TextPlaylistInput) -> Iterator[str]:
+    """입력 줄을 하나씩 (파일은 통째로 읽지 않는다)"""
+    if input.path:
+        with open(input.path, "r", encoding="utf-8") as f:
+            for ln in f:
+                if ln.strip():
+                    yield ln.strip()
+    else:
+        yield from input.lines or []
+
+
+async def _iter_resolved(lines: Iterator[str], itunes_sem: asyncio.Semaphore,
+                         mb_sem: asyncio.Semaphore) -> AsyncIterator[TrackInfo]:
+    """
+    줄 순서대로 TrackInfo 를 흘려준다.
+    TRACK_WINDOW 줄씩 읽어 로컬 카탈로그에서 한꺼번에 매칭하고, 못 찾은 줄은 태스크로 예약.
+    예약된 태스크가 2*TRACK_WINDOW 를 넘지 않게 앞에서부터 기다려 내보낸다 (메모리 일정).
+    """
+    pending: deque = deque()
+    batch = []
+
+    async def schedule():
+        # 카탈로그 첫 로드와 cdist 는 CPU 작업 → 스레드에서 (진행 중인 조회/progress 알림을 막지 않게)
+        pairs = [parse_line(ln) for ln in batch]
+        found = await asyncio.to_thread(lambda: get_catalog().lookup_many(pairs))
+        for ln, hit in zip(batch, found):
+            if hit is not None:
+                artist, title = parse_line(ln)
+                info = TrackInfo(title=title or ln, artist=artist or None, genre=hit[0], source="catalog", confidence=hit[1])
+                fut = asyncio.get_running_loop().create_future()
+                fut.set_result(info)
+                pending.append(fut)
+            else:
+                pending.append(asyncio.ensure_future(_resolve_line(ln, itunes_sem, mb_sem)))
+        batch.clear()
+
+    try:
+        for ln in lines:
+            batch.append(ln)
+            if len(batch) >= TRACK_WINDOW:
+                await schedule()
+                while len(pending) > TRACK_WINDOW:
+                    yield await pending.popleft()
+        if batch:
+            await schedule()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for fut in pending:
+            fut.cancel()
+
 
 @app.tool()
-def resolve_text_playlist(input: TextPlaylistInput) -> TextPlaylistMoodResult:
+async def resolve_text_playlist(
+    input: TextPlaylistInput,
+    summary_only: bool = False,
+    ctx: Context = None,
+) -> TextPlaylistMoodResult:
+    """
+    텍스트 플레이리스트 → 곡별 장르 + 전체 분위기.
+    진행 상황은 PROGRESS_EVERY 곡마다 MCP progress 로 보낸다 (message = {"done", "genres": 지금까지 상위 장르} JSON).
+    summary_only=True 면 tracks 는 비우고 장르 개수만 모아 label/summary 만 돌려준다 (긴 목록의 메모리/응답 크기 제한).
+    """
     if not input.path and not input.lines:
         raise ValueError("path 또는 lines 중 하나가 필요합니다.")
-    lines = input.lines or []
-    if input.path:
-        with open(input.path, "r", encoding="utf-8") as f:
-            lines = [ln.strip() for ln in f if ln.strip()]
+    total: Optional[int] = len(input.lines) if not input.path else None
+    itunes_sem = asyncio.Semaphore(ITUNES_CONCURRENCY)
+    mb_sem = asyncio.Semaphore(MB_CONCURRENCY)
+
+    counts: Counter = Counter()
     resolved = []
-    genres = []
-    for ln in lines:
-        artist, title = parse_line(ln)
-        g, conf = itunes_genre(artist, title)
-        src = "itunes"
-        if not g:
-            g2, conf2 = mb_genre(artist, title)
-            if g2:
-                g, conf, src = g2, conf2, "musicbrainz"
-        genres.append(g or "unknown")
-        resolved.append(TrackInfo(title=title or ln, artist=artist or None, genre=g or None, source=src, confidence=float(conf)))
-    label = mood_from_genres([g for g in genres if g and g != "unknown"])
-    from collections import Counter
-    top = ", ".join([f"{g}×{c}" for g,c in Counter([g or "unknown" for g in genres]).most_common(3)])
+    done = reported = 0
+
+    async def report(total: Optional[int]):
+        nonlocal reported
+        partial = {"done": done, "genres": dict(counts.most_common(10))}
+        await ctx.report_progress(done, total, message=json.dumps(partial, ensure_ascii=False))
+        reported = done
+
+    async for info in _iter_resolved(_iter_lines(input), itunes_sem, mb_sem):
+        counts[info.genre or "unknown"] += 1
+        if not summary_only:
+            resolved.append(info)
+        done += 1
+        if ctx is not None and (done % PROGRESS_EVERY == 0 or done == total):
+            await report(total)
+    if ctx is not None and done != reported:
+        # path 입력은 total 을 모르므로 마지막 묶음은 여기서 (최종 장르 개수 포함; 이제 total = done)
+        await report(done)
+
+    label = mood_from_genre_counts({g: c for g, c in counts.items() if g != "unknown"})
+    top = ", ".join([f"{g}×{c}" for g,c in counts.most_common(3)])
     summary = f"장르 분포: {top}"
     return TextPlaylistMoodResult(label=label, summary=summary, tracks=resolved)
 
 
+@app.tool()
+def track_cache_info() -> Dict[str, Any]:
+    """트랙 메타데이터 캐시 적중률/크기 + 로컬 카탈로그 크기 + HTTP 커넥션 재사용 통계"""
+    return {"tracks": track_cache_stats(), "catalog_size": len(get_catalog()), "http": http_stats()}
+
+
 if __name__ == "__main__":
     app.run()
\ No newline at end of file
@@ -1,12 +1,11 @@
 ########################################
 # smart_client.py (자동 라우팅 클라이언트; 어떤 서버를 쓸지 판단 + 장애내성)
 ########################################
-import argparse, asyncio, json, os, sys
-from typing import Optional, Dict, Any, List
+import argparse, asyncio, json, os, sys, time
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
 from dotenv import load_dotenv
-from contextlib import AsyncExitStack
 from mcp.client.session import ClientSession
-from mcp.client.stdio import stdio_client, StdioServerParameters
+from utils.mcp_startup import ServerManager, required_servers
 
 # --- 유틸: 결과 추출 ---
 def extract_payload(res):
@@ -37,26 +36,78 @@ def coerce_text_playlist_to_stats(tp: Dict[str, Any]) -> Optional[Dict[str, Any]
     stats = {"energy":0.5, "valence":0.5, "danceability":0.5, "tempo":110}
     return {"label": label, "summary": summary, "stats": stats}
 
+# exif 서버에 넘길 주소/날씨 조회 마감 = 호출 타임아웃 - 여유 (EXIF 읽기 + 응답 전송 몫)
+EXIF_DEADLINE_MARGIN = float(os.getenv("EXIF_DEADLINE_MARGIN", "2.0"))
+
+def lookup_deadline(timeout: float) -> float:
+    """호출 타임아웃보다 먼저 끝나도록: 부분 결과가 타임아웃 전에 도착해야 날짜/GPS 를 잃지 않는다"""
+    return max(0.5, min(timeout - EXIF_DEADLINE_MARGIN, timeout * 0.75))
+
 # --- 장애내성: 안전 호출 래퍼 ---
-async def safe_call(label: str, session: ClientSession, tool: str, *payloads: List[Dict[str, Any]], timeout: float = 8.0):
+async def safe_call(label: str, session: ClientSession, tool: str, *payloads: List[Dict[str, Any]], timeout: float = 8.0,
+                    progress: Optional[Callable[[float, Optional[float], Optional[str]], Awaitable[None]]] = None):
     try:
-        res = await asyncio.wait_for(session.call_tool(tool, *payloads), timeout=timeout)
+        res = await asyncio.wait_for(session.call_tool(tool, *payloads, progress_callback=progress), timeout=timeout)
         return extract_payload(res)
     except Exception as e:
         print(f"[warn] {label}::{tool} 실패 → 제외합니다: {e}", file=sys.stderr)
         return None
 
-async def spawn(stack: AsyncExitStack, path: str) -> Optional[ClientSession]:
-    try:
-        params = StdioServerParameters(command=sys.executable, args=[path], cwd=os.getcwd(), env=os.environ.copy())
-        read, write = await stack.enter_async_context(stdio_client(params))
-        sess = ClientSession(read, write)
-        await stack.enter_async_context(sess)
-        await sess.initialize()
-        return sess
-    except Exception as e:
-        print(f"[warn] 서버 스폰 실패({path}): {e}", file=sys.stderr)
-        return None
+# --- 의존성 기반 팬아웃 ---
+Branch = Tuple[Callable[[Dict[str, Any]], Awaitable[Any]], Tuple[str, ...]]
+
+async def fan_out(branches: Dict[str, Branch], deadline: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    branches: label → (run(results) 코루틴 함수, 선행 label 튜플)
+    - 선행 브랜치가 없는 브랜치는 전부 동시에 시작 → 전체 지연 ≈ 가장 느린 브랜치
+    - 선행 브랜치가 있으면 그것들이 끝난 뒤 시작 (results 에서 선행 결과를 읽는다)
+    - 브랜치가 예외를 내면 결과는 None (다운스트림은 None 을 받고 계속 진행)
+    - deadline(초)이 있으면 그때까지 끝나지 않은 선행 브랜치는 취소하고 None 으로 진행
+    """
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+    t0 = time.perf_counter()
+
+    async def run(label: str):
+        fn, deps = branches[label]
+        if deps:
+            remaining = None if deadline is None else max(0.0, deadline - (time.perf_counter() - t0))
+            _, pending = await asyncio.wait([tasks[d] for d in deps], timeout=remaining)
+            for t in pending:
+                t.cancel()
+            if pending:
+                late = [d for d in deps if tasks[d] in pending]
+                print(f"[warn] deadline {deadline}s 초과 → {', '.join(late)} 제외하고 {label} 진행", file=sys.stderr)
+        t = time.perf_counter()
+        try:
+            results[label] = await fn(results)
+        except asyncio.CancelledError:
+            results[label] = None
+            raise
+        except Exception as e:
+            print(f"[warn] {label} 브랜치 실패 → 제외합니다: {e}", file=sys.stderr)
+            results[label] = None
+        finally:
+            timings[label] = time.perf_counter() - t
+
+    for label in branches:
+        tasks[label] = asyncio.create_task(run(label))
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+    for label in branches:
+        results.setdefault(label, None)
+    return results, timings
+
+def parse_branch_timeouts(items: Optional[List[str]]) -> Dict[str, float]:
+    """["caption=20", "exif=12"] → {"caption": 20.0, "exif": 12.0}"""
+    out: Dict[str, float] = {}
+    for it in items or []:
+        k, _, v = it.partition("=")
+        try:
+            out[k.strip()] = float(v)
+        except ValueError:
+            print(f"[warn] --branch_timeout 형식 오류(label=초): {it}", file=sys.stderr)
+    return out
 
 async def main():
     load_dotenv()
@@ -71,55 +122,57 @@ async def main():
     p.add_argument("--target", type=int, default=14, help="최종 요약 글자 수(10~20 권장)")
     p.add_argument("--timeout", type=float, default=8.0, help="각 서버 호출 타임아웃(초)")
     p.add_argument("--allow_no_image", action="store_true", help="이미지 없이도 요약 허용")
+    p.add_argument("--branch_timeout", type=str, nargs="*", default=None, help="브랜치별 타임아웃 덮어쓰기 (예: caption=20 exif=12)")
+    p.add_argument("--deadline", type=float, default=None, help="입력 브랜치 전체 마감(초). 넘기면 끝난 결과만으로 합성")
+    p.add_argument("--stream", action="store_true", help="합성 결과를 토큰 단위로 stderr 에 바로 출력 (TTFT 측정)")
     args = p.parse_args()
 
-    sessions: dict[str, ClientSession] = {}
-
-    async with AsyncExitStack() as stack:
-        # 서버 기동 (없으면 스폰)
-        for label, path in [
-            ("caption", "servers/caption_server.py"),
-            ("playlist", "servers/playlist_server.py"),
-            ("trackinfo", "servers/trackinfo_server.py"),
-            ("mbti", "servers/mbti_server.py"),
-            ("diary", "servers/diary_server.py"),
-            ("exif", "servers/exif_server.py"),
-            ("synth", "servers/synth_server.py"),
-        ]:
-            if os.path.exists(path):
-                sess = await spawn(stack, path)
-                if sess:
-                    sessions[label] = sess
+    async with ServerManager(env=os.environ.copy()) as servers:
+        # 서버 기동: 입력에 필요한 서버만 병렬로 시작 (각 브랜치는 자기 서버가 뜨는 대로 진행)
+        servers.start(required_servers(args.image, args.playlist, args.mbti, args.diary))
+
+        timeouts = parse_branch_timeouts(args.branch_timeout)
+        def tmo(label: str, default: Optional[float] = None) -> float:
+            return timeouts.get(label, default or args.timeout)
 
         # --- 1) 이미지 입력 처리 ---
-        caption_res = None
-        meta_res = None
-        if is_file(args.image) and sessions.get("caption") and sessions.get("exif"):
-            caption_res = await safe_call("caption", sessions["caption"], "caption_image", {"input": {"path": args.image}}, timeout=args.timeout)
-            meta_res = await safe_call("exif", sessions["exif"], "extract_image_metadata", {"input": {"path": args.image}}, {"weather": {"use_open_meteo": True}}, timeout=args.timeout)
+        async def run_caption(_):
+            if is_file(args.image) and (sess := await servers.get("caption")):
+                return await safe_call("caption", sess, "caption_image", {"input": {"path": args.image}}, timeout=tmo("caption"))
+
+        async def run_exif(_):
+            if is_file(args.image) and (sess := await servers.get("exif")):
+                limit = min(tmo("exif"), args.deadline) if args.deadline else tmo("exif")
+                return await safe_call("exif", sess, "extract_image_metadata",
+                                       {"input": {"path": args.image}, "weather": {"use_open_meteo": True},
+                                        "deadline": lookup_deadline(limit)}, timeout=tmo("exif"))
 
         # --- 2) 플레이리스트 입력 처리 ---
-        playlist_res_for_synth = None
-        if args.playlist:
-            if is_spotify_playlist(args.playlist) and sessions.get("playlist"):
-                playlist_stats = await safe_call("playlist", sessions["playlist"], "analyze_playlist", {"input": {"spotify_url": args.playlist}}, timeout=args.timeout)
-                playlist_res_for_synth = playlist_stats or None
-            elif sessions.get("trackinfo"):
+        async def run_playlist(_):
+            if not args.playlist:
+                return None
+            if is_spotify_playlist(args.playlist):
+                if not (sess := await servers.get("playlist")):
+                    return None
+                playlist_stats = await safe_call("playlist", sess, "analyze_playlist", {"input": {"spotify_url": args.playlist}}, timeout=tmo("playlist"))
+                return playlist_stats or None
+            elif sess := await servers.get("trackinfo"):
                 if is_file(args.playlist):
-                    tp = await safe_call("trackinfo", sessions["trackinfo"], "resolve_text_playlist", {"input": {"path": args.playlist}}, timeout=args.timeout)
+                    tp = await safe_call("trackinfo", sess, "resolve_text_playlist", {"input": {"path": args.playlist}}, timeout=tmo("playlist"))
                 else:
                     lines = [s.strip() for s in args.playlist.replace(";", "").replace(",", "").splitlines() if s.strip()]
-                    tp = await safe_call("trackinfo", sessions["trackinfo"], "resolve_text_playlist", {"input": {"lines": lines}}, timeout=args.timeout)
-                playlist_res_for_synth = coerce_text_playlist_to_stats(tp) if tp else None
+                    tp = await safe_call("trackinfo", sess, "resolve_text_playlist", {"input": {"lines": lines}}, timeout=tmo("playlist"))
+                return coerce_text_playlist_to_stats(tp) if tp else None
 
         # --- 3) MBTI 입력 처리 ---
-        mbti_res = None
-        if args.mbti and sessions.get("mbti"):
-            mbti_res = await safe_call("mbti", sessions["mbti"], "infer_mbti_traits", {"input": {"mbti": args.mbti.upper()}}, timeout=args.timeout)
+        async def run_mbti(_):
+            if args.mbti and (sess := await servers.get("mbti")):
+                return await safe_call("mbti", sess, "infer_mbti_traits", {"input": {"mbti": args.mbti.upper()}}, timeout=tmo("mbti"))
 
         # --- 4) 일기 입력 처리 ---
-        diary_res = None
-        if args.diary and sessions.get("diary"):
+        async def run_diary(_):
+            if not (args.diary and (sess := await servers.get("diary"))):
+                return None
             if is_file(args.diary):
                 try:
                     with open(args.diary, "r", encoding="utf-8") as f:
@@ -128,29 +181,70 @@ async def main():
                     text = str(args.diary)
             else:
                 text = args.diary
-            diary_res = await safe_call("diary", sessions["diary"], "summarize_diary", {"input": {"text": text, "language": "ko"}}, timeout=args.timeout)
+            return await safe_call("diary", sess, "summarize_diary", {"input": {"text": text, "language": "ko"}}, timeout=tmo("diary"))
 
         # --- 5) 최종 합성 준비 (caption 없을 때 대체 캡션 생성) ---
-        if not caption_res:
-            if not args.allow_no_image:
-                print("[warn] caption_server 사용 불가 또는 이미지 미제공: 기본 캡션으로 진행합니다. (--allow_no_image로 경고 무시 가능)", file=sys.stderr)
-            caption_res = {"caption": "이미지 없음", "tags": []}
-
         persona = {"age": args.age, "gender": args.gender, "nationality": args.nation}
-        payload = {
-            "caption": caption_res,
-            "playlist": playlist_res_for_synth,
-            "mbti": mbti_res,
-            "diary": diary_res,
-            "meta": meta_res,
-            "persona": persona,
-            "target_chars": args.target
-        }
-
-        # --- 6) 합성: synth 서버 우선, 실패 시 로컬 LLM 폴백 ---
-        final = None
-        if sessions.get("synth"):
-            final = await safe_call("synth", sessions["synth"], "synthesize_dayline", {"input": payload}, timeout=max(6.0, args.timeout))
+        payload: Dict[str, Any] = {}
+
+        def build_payload(results: Dict[str, Any]) -> Dict[str, Any]:
+            caption_res = results.get("caption")
+            if not caption_res:
+                if not args.allow_no_image:
+                    print("[warn] caption_server 사용 불가 또는 이미지 미제공: 기본 캡션으로 진행합니다. (--allow_no_image로 경고 무시 가능)", file=sys.stderr)
+                caption_res = {"caption": "이미지 없음", "tags": []}
+            return {
+                "caption": caption_res,
+                "playlist": results.get("playlist"),
+                "mbti": results.get("mbti"),
+                "diary": results.get("diary"),
+                "meta": results.get("exif"),
+                "persona": persona,
+                "target_chars": args.target
+            }
+
+        # --- 6) 합성: synth 서버 우선 (모든 입력 브랜치에 의존) ---
+        ttft: Dict[str, float] = {}
+
+        async def run_synth(results):
+            payload.update(build_payload(results))
+            if sess := await servers.get("synth"):
+                if not args.stream:
+                    return await safe_call("synth", sess, "synthesize_dayline", {"input": payload}, timeout=tmo("synth", max(6.0, args.timeout)))
+                t0 = time.perf_counter()
+
+                async def on_progress(progress, total, message):
+                    # synth_server 는 stream=True 일 때 토큰 조각을 progress message 로 보낸다
+                    if message:
+                        ttft.setdefault("synth", time.perf_counter() - t0)
+                        print(message, end="", file=sys.stderr, flush=True)
+
+                out = await safe_call("synth", sess, "synthesize_dayline", {"input": payload, "stream": True},
+                                      timeout=tmo("synth", max(6.0, args.timeout)), progress=on_progress)
+                print(file=sys.stderr)
+                return out
+
+        inputs = ("caption", "exif", "playlist", "mbti", "diary")
+        results, timings = await fan_out({
+            "caption": (run_caption, ()),
+            "exif": (run_exif, ()),
+            "playlist": (run_playlist, ()),
+            "mbti": (run_mbti, ()),
+            "diary": (run_diary, ()),
+            "synth": (run_synth, inputs),
+        }, deadline=args.deadline)
+        print(servers.report(), file=sys.stderr)
+        print("[timing] " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items())
+              + "".join(f", {k} ttft {v:.2f}s" for k, v in ttft.items()), file=sys.stderr)
+
+        if not payload:  # synth 브랜치가 payload 를 만들기 전에 실패한 경우
+            payload.update(build_payload(results))
+        caption_res = payload["caption"]
+        playlist_res_for_synth = results["playlist"]
+        mbti_res = results["mbti"]
+        diary_res = results["diary"]
+        meta_res = results["exif"]
+        final = results["synth"]
 
         if not final:
             # 로컬 LLM 폴백 (OpenAI API 직접 호출)
@@ -181,7 +275,7 @@ async def main():
                 "mbti": bool(mbti_res),
                 "diary": bool(diary_res),
                 "meta": bool(meta_res),
-                "fallback": "synth" not in sessions
+                "fallback": await servers.get("synth") is None
             }
         }, ensure_ascii=False, indent=2))
 
@@ -0,0 +1,55 @@
+########################################
+# test_fast_planner.py (규칙 기반 Plan 표 테스트; pytest test_fast_planner.py)
+########################################
+import pytest
+from utils.fast_planner import fast_plan
+
+ALL_ON = (True, True, True, True)
+
+# (프롬프트, (need_caption, need_exif, want_weather, want_address) 또는 None = LLM Planner 로 넘김)
+CASES = [
+    ("메타만 뽑아줘. 주소는 프라이버시 때문에 끄고 날씨만 알려줘.", (False, True, True, False)),
+    ("", ALL_ON),
+    ("둘 다 켜줘", ALL_ON),
+    ("캡션 만들어줘", ALL_ON),
+    ("캡션만 만들어줘", (True, False, False, False)),
+    ("캡션은 빼고 날씨만 알려줘", (False, True, True, False)),
+    ("캡션은 안해도 돼", (False, True, True, True)),
+    ("캡션은 안 해도 돼", (False, True, True, True)),
+    ("캡션은 됐어", (False, True, True, True)),
+    ("메타는 괜찮아", (True, False, False, False)),
+    ("날씨는 싫어", (True, True, False, True)),
+    ("주소는 넣지 마", (True, True, True, False)),
+    ("날씨는 필요 없어", (True, True, False, True)),
+    # 부정어가 요청이 아니라 묘사에 붙은 경우
+    ("날씨 안 좋은 날 찍은 사진 일기 써줘", None),
+    ("주소 없는 사진이야", None),
+    ("날씨가 괜찮아서 산책했어", None),
+    # "X만" 이 부정과 같이 오면 X 만 끈다
+    ("캡션만 빼고 다", (False, True, True, True)),
+    ("주소만 빼줘", (True, True, True, False)),
+    # 거두는 동사를 다시 부정한 경우 (이중 부정)
+    ("주소는 빼지 마", None),
+    ("주소는 빼지 말아줘", None),
+    ("날씨 제외하지 마", None),
+    ("날씨 빼지 말고 넣어줘", None),
+    ("캡션 생략하지 마", None),
+    ("메타 빼먹지 마", None),
+    ("날씨는 끄지 말고 주소는 꺼", None),
+    # 무엇을 끄는지 모르거나, 서로 어긋나거나, 조건/위임인 경우
+    ("안 해도 돼", None),
+    ("오늘 하루 일기 써줘", None),
+    ("캡션은 켜고 캡션은 꺼", None),
+    ("메타는 빼고 날씨만 알려줘", None),
+    ("캡션 넣을지 말지 알아서 해", None),
+    ("주소도 넣어줄래?", None),
+]
+
+
+@pytest.mark.parametrize("prompt,expected", CASES)
+def test_fast_plan(prompt, expected):
+    plan = fast_plan(prompt)
+    if expected is None:
+        assert plan is None
+    else:
+        assert plan == dict(zip(("need_caption", "need_exif", "want_weather", "want_address"), expected))
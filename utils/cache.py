@@ -0,0 +1,185 @@
+########################################
+# utils/cache.py (공유 영속 캐시; sqlite 기반 TTL + 용량 제한 + 적중 통계)
+########################################
+import os, json, time, sqlite3, hashlib, threading
+from concurrent.futures import Future
+from typing import Optional, Any, Dict, Callable, Iterable, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("DAYLINE_CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+# 만료 청소/용량 정리는 이만큼 쓸 때마다 한 번 (그 사이에는 max_entries 를 최대 이만큼 넘을 수 있다)
+CACHE_SWEEP_EVERY = int(os.getenv("CACHE_SWEEP_EVERY", "256"))
+
+
+def make_key(*parts: Any) -> str:
+    """여러 조각 → sha256 hex. dict/list 는 키 정렬된 JSON 으로 직렬화해서 섞는다."""
+    h = hashlib.sha256()
+    for p in parts:
+        s = p if isinstance(p, str) else json.dumps(p, ensure_ascii=False, sort_keys=True, default=str)
+        h.update(s.encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class DiskCache:
+    """
+    이름별 sqlite 파일 하나(CACHE_DIR/<name>.sqlite)에 JSON 값을 저장하는 캐시.
+    - ttl(초): 기본 수명. set(..., ttl=) 로 항목별 수명 지정 가능 (None/0 이하 → 만료 없음)
+    - max_entries: 넘으면 가장 오래 안 쓰인 항목부터 제거 (LRU, CACHE_SWEEP_EVERY 번 쓸 때마다 정리)
+    - set_many: 여러 항목을 트랜잭션 하나로 기록 (배치 호출자용)
+    - 여러 서버 프로세스가 같은 파일을 공유해도 되도록 WAL 모드
+    - 캐시 파일을 열 수 없으면 메모리 DB 로 동작 (캐시 실패가 기능 실패가 되지 않게)
+    """
+
+    def __init__(self, name: str, max_entries: int = 10000, ttl: Optional[float] = None, path: Optional[str] = None):
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.path = path or os.path.join(CACHE_DIR, f"{name}.sqlite")
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expired": 0}
+        self._unswept = CACHE_SWEEP_EVERY   # 첫 쓰기에서 한 번 청소 (이전 실행이 남긴 만료 항목)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = self._open(self.path)
+        except (OSError, sqlite3.Error):
+            self._db = self._open(":memory:")
+
+    @staticmethod
+    def _open(path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires REAL, accessed REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed)")
+        db.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache(expires)")
+        return db
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT value, expires FROM cache WHERE key=?", (key,)).fetchone()
+                if row is None:
+                    self._stats["misses"] += 1
+                    return default
+                value, expires = row
+                if expires is not None and expires < now:
+                    self._db.execute("DELETE FROM cache WHERE key=?", (key,))
+                    self._stats["expired"] += 1
+                    self._stats["misses"] += 1
+                    return default
+                self._db.execute("UPDATE cache SET accessed=? WHERE key=?", (now, key))
+            except sqlite3.Error:
+                self._stats["misses"] += 1
+                return default
+            self._stats["hits"] += 1
+        return json.loads(value)
+
+    def _row(self, key: str, value: Any, ttl: Optional[float], now: float) -> Tuple[str, str, Optional[float], float]:
+        ttl = self.ttl if ttl is None else (ttl if ttl > 0 else None)
+        expires = now + ttl if ttl else None
+        return key, json.dumps(value, ensure_ascii=False, default=str), expires, now
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.set_many([(key, value)], ttl=ttl)
+
+    def set_many(self, items: Iterable[Tuple[str, Any]], ttl: Optional[float] = None):
+        """[(key, value), ...] 를 한 트랜잭션으로 기록 (ttl 은 set 과 같은 규칙으로 전체에 적용)"""
+        now = time.time()
+        rows = [self._row(k, v, ttl, now) for k, v in items]
+        if not rows:
+            return
+        with self._lock:
+            try:
+                self._db.execute("BEGIN")
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO cache(key, value, expires, accessed) VALUES (?,?,?,?)", rows
+                    )
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+                self._stats["sets"] += len(rows)
+                self._unswept += len(rows)
+                if self._unswept >= CACHE_SWEEP_EVERY:
+                    self._unswept = 0
+                    self._evict(now)
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, now: float):
+        cur = self._db.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires < ?", (now,))
+        self._stats["expired"] += max(0, cur.rowcount)
+        (n,) = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()
+        over = n - self.max_entries
+        if over > 0:
+            self._db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)", (over,)
+            )
+            self._stats["evictions"] += over
+
+    def delete(self, key: str):
+        with self._lock:
+            try:
+                self._db.execute("DELETE FROM cache WHERE key=?", (key,))
+            except sqlite3.Error:
+                pass
+
+    def clear(self):
+        with self._lock:
+            try:
+                self._db.execute("DELETE FROM cache")
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            try:
+                (size,) = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()
+            except sqlite3.Error:
+                size = 0
+            out: Dict[str, Any] = dict(self._stats)
+        lookups = out["hits"] + out["misses"]
+        out.update({"name": self.name, "size": size, "max_entries": self.max_entries,
+                    "ttl": self.ttl, "hit_rate": round(out["hits"] / lookups, 4) if lookups else 0.0})
+        return out
+
+
+class SingleFlight:
+    """
+    같은 key 로 동시에 들어온 호출을 하나로 합친다 (스레드 기준).
+    첫 호출(leader)만 fn 을 실행하고, 그동안 들어온 호출은 그 결과(또는 예외)를 같이 받는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return fut.result()
+        try:
+            res = fn(*args, **kwargs)
+            fut.set_result(res)
+            return res
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
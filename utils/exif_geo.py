@@ -1,8 +1,12 @@
 # utils/exif_geo.py
-from typing import Optional, Dict, Any
+import os, math, mmap, struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, Iterator, Tuple, Union, List
 from PIL import Image, ExifTags
-import requests
 import datetime as dt
+from utils.cache import DiskCache, SingleFlight
+from utils.http import session as http_session
 
 # ----- 내부 유틸: IFDRational/분수 안전 변환 -----
 def _to_float(x):
@@ -37,8 +41,8 @@ def _exif_date_to_iso(date_str: Optional[str]) -> Optional[str]:
         return date_str[:10].replace(":", "-")
 
 # ----- EXIF → datetime / GPS -----
-def extract_exif_meta(path: str) -> Dict[str, Any]:
-    """이미지에서 촬영시각/위치(GPS)만 추출."""
+def _extract_exif_meta_pil(path: str) -> Dict[str, Any]:
+    """PIL 로 이미지를 열어 촬영시각/위치(GPS) 추출 (fast 경로가 못 읽는 포맷용)."""
     with Image.open(path) as img:
         exif = img._getexif() or {}
     tag_map = {ExifTags.TAGS.get(k, k): v for k, v in exif.items()}
@@ -61,44 +65,320 @@ def extract_exif_meta(path: str) -> Dict[str, Any]:
             pass
     return out
 
+# ----- 헤더만 읽는 EXIF 파서 (픽셀 데이터는 건드리지 않음) -----
+_EXIF_SCAN_LIMIT = 512 * 1024      # APP1 을 찾을 때 훑는 최대 바이트 (SOS 전에 끝남)
+_TIFF_TYPE_SIZE = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+_TAG_DATETIME, _TAG_EXIF_IFD, _TAG_GPS_IFD, _TAG_DATETIME_ORIGINAL = 0x0132, 0x8769, 0x8825, 0x9003
+
+def _jpeg_app1_exif(f) -> Optional[bytes]:
+    """
+    JPEG 마커를 따라가며 'Exif\\0\\0' APP1 페이로드(TIFF 바이트)만 읽는다.
+    SOS/EOI 까지 Exif 가 없으면 b"" (정말 없음), 끝까지 못 훑었으면 None (→ 호출자가 PIL 로 폴백):
+    _EXIF_SCAN_LIMIT 초과, 마커 자리에 0xFF 가 아닌 바이트, 파일이 중간에 끊김.
+    """
+    if f.read(2) != b"\xff\xd8":
+        return None
+    scanned = 2
+    while scanned < _EXIF_SCAN_LIMIT:
+        head = f.read(4)
+        if len(head) < 4 or head[0] != 0xFF:
+            return None
+        marker, length = head[1], struct.unpack(">H", head[2:])[0]
+        if marker == 0xFF:              # 패딩 바이트: 한 바이트 밀어서 다시
+            f.seek(-3, os.SEEK_CUR)
+            scanned += 1
+            continue
+        if marker in (0xDA, 0xD9):      # SOS/EOI → 더 이상 메타 없음
+            return b""
+        if marker == 0xE1:
+            body = f.read(length - 2)
+            if len(body) < length - 2:
+                return None
+            if body[:6] == b"Exif\x00\x00":
+                return body[6:]
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+        scanned += 2 + length
+    return None
+
+def _tiff_ifd(buf, off: int, bo: str) -> Dict[int, Any]:
+    """IFD 하나를 {tag: 값} 으로. 값은 ASCII → str, RATIONAL → (num, den) 튜플 목록, 그 외 정수."""
+    (n,) = struct.unpack_from(bo + "H", buf, off)
+    out: Dict[int, Any] = {}
+    for i in range(n):
+        e = off + 2 + 12 * i
+        tag, typ, cnt = struct.unpack_from(bo + "HHI", buf, e)
+        size = _TIFF_TYPE_SIZE.get(typ)
+        if size is None:
+            continue
+        nbytes = size * cnt
+        voff = e + 8 if nbytes <= 4 else struct.unpack_from(bo + "I", buf, e + 8)[0]
+        if voff + nbytes > len(buf):
+            continue
+        if typ == 2:
+            out[tag] = bytes(buf[voff:voff + nbytes]).split(b"\x00", 1)[0].decode("ascii", "replace").strip()
+        elif typ in (5, 10):
+            fmt = bo + ("%dI" if typ == 5 else "%di") % (2 * cnt)
+            v = struct.unpack_from(fmt, buf, voff)
+            out[tag] = [(v[j], v[j + 1]) for j in range(0, len(v), 2)]
+        elif typ in (3, 4, 9):
+            fmt = bo + {3: "%dH", 4: "%dI", 9: "%di"}[typ] % cnt
+            v = struct.unpack_from(fmt, buf, voff)
+            out[tag] = v[0] if cnt == 1 else list(v)
+        else:
+            out[tag] = bytes(buf[voff:voff + nbytes])
+    return out
+
+def _tiff_meta(buf) -> Dict[str, Any]:
+    """TIFF(EXIF) 바이트 → {"datetime", "gps"} (PIL 경로와 같은 모양)"""
+    bo = {b"II": "<", b"MM": ">"}.get(bytes(buf[:2]))
+    if bo is None or struct.unpack_from(bo + "H", buf, 2)[0] != 42:
+        raise ValueError("TIFF 헤더가 아님")
+    ifd0 = _tiff_ifd(buf, struct.unpack_from(bo + "I", buf, 4)[0], bo)
+    exif = _tiff_ifd(buf, ifd0[_TAG_EXIF_IFD], bo) if isinstance(ifd0.get(_TAG_EXIF_IFD), int) else {}
+    out: Dict[str, Any] = {
+        "datetime": exif.get(_TAG_DATETIME_ORIGINAL) or ifd0.get(_TAG_DATETIME) or None,
+        "gps": None,
+    }
+    if isinstance(ifd0.get(_TAG_GPS_IFD), int):
+        try:
+            g = _tiff_ifd(buf, ifd0[_TAG_GPS_IFD], bo)
+            lat = _dms_to_deg([_to_float(r) for r in g[2]])
+            lon = _dms_to_deg([_to_float(r) for r in g[4]])
+            lat_ref = str(g.get(1, "N")).upper()
+            lon_ref = str(g.get(3, "E")).upper()
+            lat =  abs(lat) if lat_ref == "N" else -abs(lat)
+            lon =  abs(lon) if lon_ref == "E" else -abs(lon)
+            out["gps"] = {"lat": round(lat, 7), "lon": round(lon, 7)}
+        except Exception:
+            pass
+    return out
+
+def read_exif_fast(path: str) -> Optional[Dict[str, Any]]:
+    """
+    JPEG 은 APP1 세그먼트만 bounded read, TIFF 계열은 mmap 으로 필요한 IFD 페이지만 접근.
+    지원하지 않는 포맷이거나 JPEG 마커를 끝까지 못 훑었으면 None (→ 호출자가 PIL 경로로 폴백).
+    """
+    with open(path, "rb") as f:
+        sig = f.read(4)
+        f.seek(0)
+        if sig[:2] == b"\xff\xd8":
+            tiff = _jpeg_app1_exif(f)
+            if tiff is None:
+                return None     # 마커를 끝까지 못 따라감 → PIL
+            return _tiff_meta(tiff) if tiff else {"datetime": None, "gps": None}
+        if sig in (b"II*\x00", b"MM\x00*"):
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _tiff_meta(mm)
+    return None
+
+def extract_exif_meta(path: str) -> Dict[str, Any]:
+    """이미지에서 촬영시각/위치(GPS)만 추출. 헤더 파서 우선, 실패/미지원 포맷은 PIL."""
+    try:
+        out = read_exif_fast(path)
+        if out is not None:
+            return out
+    except Exception:
+        pass
+    return _extract_exif_meta_pil(path)
+
+# ----- 배치 스캔 (디렉터리/경로 목록 → 워커 풀) -----
+IMAGE_EXTS = {".jpg", ".jpeg", ".jpe", ".mpo", ".tif", ".tiff", ".dng", ".png", ".heic", ".webp"}
+
+def iter_image_paths(root: str, recursive: bool = True) -> Iterator[str]:
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(e.path)
+                    elif os.path.splitext(e.name)[1].lower() in IMAGE_EXTS:
+                        yield e.path
+        except OSError:
+            continue
+
+def _safe_meta(path: str) -> Dict[str, Any]:
+    try:
+        return extract_exif_meta(path)
+    except Exception as e:
+        return {"datetime": None, "gps": None, "error": f"{type(e).__name__}: {e}"}
+
+def extract_exif_batch(paths: Union[str, Iterable[str]], max_workers: Optional[int] = None,
+                       recursive: bool = True) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    디렉터리 경로(또는 파일 경로 iterable)를 받아 (path, meta) 를 입력 순서대로 흘려준다.
+    - 헤더만 읽으므로 I/O 대기가 대부분 → 스레드 풀
+    - 진행 중인 작업 수를 max_workers*4 로 묶어 10만 장 목록도 메모리가 일정
+    - 실패한 파일은 meta["error"] 로 표시하고 계속 진행
+    """
+    it = iter_image_paths(paths, recursive) if isinstance(paths, str) else iter(paths)
+    workers = max_workers or min(32, (os.cpu_count() or 4) * 4)
+    window: deque = deque()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for p in it:
+            window.append((p, ex.submit(_safe_meta, p)))
+            if len(window) >= workers * 4:
+                q, fut = window.popleft()
+                yield q, fut.result()
+        while window:
+            q, fut = window.popleft()
+            yield q, fut.result()
+
+# ----- 격자 칸 (캐시 키) -----
+def _grid_cell(lat: float, lon: float, cell: float) -> Tuple[int, int]:
+    return math.floor(lat / cell), math.floor(lon / cell)
+
+def _cell_center(ix: int, iy: int, cell: float) -> Tuple[float, float]:
+    return round((ix + 0.5) * cell, 7), round((iy + 0.5) * cell, 7)
+
 # ----- Open-Meteo 날씨 조회 -----
+# 격자 칸(WEATHER_CELL_DEG) + 날짜 단위로 캐시. 같은 도시/여행의 사진은 몇 번의 요청으로 끝난다.
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+WEATHER_DAILY = ["temperature_2m_max", "temperature_2m_min", "precipitation_sum", "weathercode"]
+WEATHER_CELL_DEG = float(os.getenv("WEATHER_CELL_DEG", "0.1"))          # 약 11km (모델 격자 수준)
+WEATHER_MAX_SPAN_DAYS = int(os.getenv("WEATHER_MAX_SPAN_DAYS", "31"))   # 요청 하나의 최대 날짜 범위
+WEATHER_MAX_COORDS = int(os.getenv("WEATHER_MAX_COORDS", "50"))         # 요청 하나의 최대 좌표 수
+WEATHER_CACHE = DiskCache(
+    "weather",
+    max_entries=int(os.getenv("WEATHER_CACHE_MAX", "50000")),
+    ttl=float(os.getenv("WEATHER_CACHE_TTL", str(7 * 24 * 3600))),
+)
+# 오늘/미래 날짜는 예보값이라 계속 바뀐다 → 짧게만 캐시
+WEATHER_FORECAST_TTL = float(os.getenv("WEATHER_FORECAST_TTL", str(3600)))
+_weather_flight = SingleFlight()
+_weather_stats = {"requests": 0}
+
+def _weather_key(cell: Tuple[int, int], iso_date: str) -> str:
+    return f"{WEATHER_CELL_DEG}:{cell[0]}:{cell[1]}:{iso_date}"
+
+def _date_windows(dates: List[str]) -> List[Tuple[str, str]]:
+    """정렬된 ISO 날짜들을 WEATHER_MAX_SPAN_DAYS 이내의 [start, end] 구간들로 묶는다."""
+    out: List[Tuple[str, str]] = []
+    for d in sorted(set(dates)):
+        if out and (dt.date.fromisoformat(d) - dt.date.fromisoformat(out[-1][0])).days < WEATHER_MAX_SPAN_DAYS:
+            out[-1] = (out[-1][0], d)
+        else:
+            out.append((d, d))
+    return out
+
+def _fetch_weather(need: Dict[Tuple[int, int], List[str]]) -> Dict[Tuple[Tuple[int, int], str], Dict[str, Any]]:
+    """
+    {격자칸: [날짜...]} 를 최소 요청으로 조회해 {(칸, 날짜): 날씨} 로 돌려주고 캐시에 채운다.
+    날짜 구간별로 좌표를 묶어(multi-coordinate) 한 번에 요청한다.
+    """
+    got: Dict[Tuple[Tuple[int, int], str], Dict[str, Any]] = {}
+    today = dt.date.today().isoformat()
+    windows = _date_windows([d for ds in need.values() for d in ds])
+    for start, end in windows:
+        cells = [c for c, ds in need.items() if any(start <= d <= end for d in ds)]
+        for i in range(0, len(cells), WEATHER_MAX_COORDS):
+            chunk = cells[i:i + WEATHER_MAX_COORDS]
+            centers = [_cell_center(ix, iy, WEATHER_CELL_DEG) for ix, iy in chunk]
+            params = {
+                "latitude": ",".join(str(la) for la, _ in centers),
+                "longitude": ",".join(str(lo) for _, lo in centers),
+                "daily": WEATHER_DAILY,
+                "timezone": "auto",
+                "start_date": start,
+                "end_date": end,
+            }
+            try:
+                _weather_stats["requests"] += 1
+                r = http_session().get(OPEN_METEO_URL, params=params, timeout=10)
+                if not r.ok:
+                    continue
+                j = r.json()
+            except Exception:
+                continue
+            rows = []
+            for cell, loc in zip(chunk, j if isinstance(j, list) else [j]):
+                d = loc.get("daily") or {}
+                cols = [d.get(k) or [] for k in WEATHER_DAILY]
+                for n, day in enumerate(d.get("time") or []):
+                    tmax, tmin, precip, code = (c[n] if n < len(c) else None for c in cols)
+                    wx = {"date": day, "tmax": tmax, "tmin": tmin, "precip": precip, "code": code}
+                    got[(cell, day)] = wx
+                    rows.append((_weather_key(cell, day), wx))
+            WEATHER_CACHE.set_many([r for r in rows if r[1]["date"] < today])
+            WEATHER_CACHE.set_many([r for r in rows if r[1]["date"] >= today], ttl=WEATHER_FORECAST_TTL)
+    return got
+
+def lookup_weather_batch(points: Iterable[Tuple[float, float, Optional[str]]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    (lat, lon, exif_datetime) 목록 → 같은 순서의 일별 날씨 목록 (실패 항목은 None).
+    캐시에 없는 (칸, 날짜)만 모아 날짜 구간 × 좌표 묶음으로 요청한다.
+    """
+    today = dt.date.today().isoformat()
+    keys: List[Tuple[Tuple[int, int], str]] = []
+    for lat, lon, when in points:
+        keys.append((_grid_cell(lat, lon, WEATHER_CELL_DEG), _exif_date_to_iso(when) or today))
+
+    found: Dict[Tuple[Tuple[int, int], str], Dict[str, Any]] = {}
+    need: Dict[Tuple[int, int], List[str]] = {}
+    for k in dict.fromkeys(keys):
+        hit = WEATHER_CACHE.get(_weather_key(*k))
+        if hit is not None:
+            found[k] = hit
+        else:
+            need.setdefault(k[0], []).append(k[1])
+    if need:
+        found.update(_fetch_weather(need))
+    return [found.get(k) for k in keys]
+
+def weather_cache_stats() -> Dict[str, Any]:
+    return {**WEATHER_CACHE.stats(), **_weather_stats, "coalesced": _weather_flight.coalesced,
+            "cell_deg": WEATHER_CELL_DEG}
+
 def lookup_weather(lat: float, lon: float, exif_datetime: Optional[str]) -> Optional[Dict[str, Any]]:
-    """GPS + EXIF 날짜 기준 일별 날씨 조회. 실패 시 None."""
+    """GPS + EXIF 날짜 기준 일별 날씨 조회. 실패 시 None. (격자 칸+날짜 캐시, 동시 조회는 요청 하나 공유)"""
     iso_date = _exif_date_to_iso(exif_datetime) or dt.date.today().isoformat()
-    try:
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum", "weathercode"],
-            "timezone": "auto",
-            "start_date": iso_date,
-            "end_date": iso_date,
-        }
-        r = requests.get("https://api.open-meteo.com/v1/forecast", params=params, timeout=10)
-        if not r.ok:
-            return None
-        j = r.json()
-        d = j.get("daily") or {}
-        return {
-            "date": (d.get("time") or [iso_date])[0],
-            "tmax": (d.get("temperature_2m_max") or [None])[0],
-            "tmin": (d.get("temperature_2m_min") or [None])[0],
-            "precip": (d.get("precipitation_sum") or [None])[0],
-            "code": (d.get("weathercode") or [None])[0],
-        }
-    except Exception:
-        return None
+    key = _weather_key(_grid_cell(lat, lon, WEATHER_CELL_DEG), iso_date)
+    return _weather_flight.do(key, lambda: lookup_weather_batch([(lat, lon, iso_date)])[0])
 
 # ----- 역지오코딩(Nominatim) -----
 HEADERS_NOMINATIM = {
     "User-Agent": "dayline-mcp/1.0 (contact: you@example.com)"
 }
 
+# 결과는 구/동(zoom 14) 수준이라 수백 m 격자 안에서는 같은 답 → 격자 칸 단위로 캐시
+GEOCODE_CELL_DEG = float(os.getenv("GEOCODE_CELL_DEG", "0.005"))  # 위도 기준 약 550m
+GEOCODE_CACHE = DiskCache(
+    "geocode",
+    max_entries=int(os.getenv("GEOCODE_CACHE_MAX", "50000")),
+    ttl=float(os.getenv("GEOCODE_CACHE_TTL", str(90 * 24 * 3600))),
+)
+_geocode_flight = SingleFlight()
+
 def reverse_geocode(lat: float, lon: float, lang: str = "ko") -> Optional[str]:
-    """GPS → 간결 주소 문자열. 실패 시 None."""
+    """
+    GPS → 간결 주소 문자열. 실패 시 None.
+    격자 칸(GEOCODE_CELL_DEG) + 언어 단위로 캐시하고, 같은 칸 동시 조회는 업스트림 요청 하나를 공유한다.
+    """
+    if lat is None or lon is None:
+        return None
+    ix, iy = _grid_cell(lat, lon, GEOCODE_CELL_DEG)
+    key = f"{GEOCODE_CELL_DEG}:{ix}:{iy}:{lang}"
+    hit = GEOCODE_CACHE.get(key)
+    if hit is not None:
+        return hit
+
+    def fetch() -> Optional[str]:
+        addr = _reverse_geocode_upstream(*_cell_center(ix, iy, GEOCODE_CELL_DEG), lang=lang)
+        if addr is not None:  # 실패(None)는 캐시하지 않고 다음에 다시 시도
+            GEOCODE_CACHE.set(key, addr)
+        return addr
+
+    return _geocode_flight.do(key, fetch)
+
+def geocode_cache_stats() -> Dict[str, Any]:
+    return {**GEOCODE_CACHE.stats(), "coalesced": _geocode_flight.coalesced, "cell_deg": GEOCODE_CELL_DEG}
+
+def _reverse_geocode_upstream(lat: float, lon: float, lang: str = "ko") -> Optional[str]:
+    """Nominatim 역지오코딩 1회 요청. 실패 시 None."""
     try:
-        if lat is None or lon is None:
-            return None
         params = {
             "format": "jsonv2",
             "lat": lat,
@@ -107,7 +387,7 @@ def reverse_geocode(lat: float, lon: float, lang: str = "ko") -> Optional[str]:
             "addressdetails": 1,
             "accept-language": lang,
         }
-        r = requests.get(
+        r = http_session().get(
             "https://nominatim.openstreetmap.org/reverse",
             params=params,
             headers=HEADERS_NOMINATIM,
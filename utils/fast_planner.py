@@ -0,0 +1,111 @@
+########################################
+# utils/fast_planner.py (규칙 기반 Plan; 흔한 한국어 요청은 LLM 없이 결정, 애매하면 None → LLM Planner)
+########################################
+import re, unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+# 주제 → 키워드 (소문자/NFKC 기준 부분 문자열)
+TOPICS: Dict[str, List[str]] = {
+    "caption": ["캡션", "해시태그", "태그", "설명", "묘사", "caption"],
+    "exif": ["메타데이터", "메타", "exif", "촬영 시간", "촬영시간", "촬영 시각", "gps"],
+    "weather": ["날씨", "기온", "강수", "weather"],
+    "address": ["주소", "위치", "장소", "지명", "동네", "역지오코딩", "address"],
+}
+SUB = ("weather", "address")   # exif 하위 옵션
+
+# 요청을 거두는 표현 (동사에 붙은 부정만: "안 해도", "넣지 마", "캡션은 됐어")
+_NEG = re.compile(
+    r"끄|꺼|빼|제외|없이|말고|생략|\boff\b|필요\s?없|지\s?마"
+    r"|(?:하|넣|붙|뽑|쓰|주|켜|보)지\s?않"
+    r"|(?<![가-힣])안\s?(?:해|하|넣|붙|줘|주|뽑|보여|알려|써|켜|돼|불러)"
+    r"|(?:됐|괜찮|싫)(?:어요?|아요?|습니다|다|고)?(?![가-힣])"
+)
+# 거두는 동사를 다시 부정 ("빼지 마", "제외하지 말고", "빼먹지 마") → 이중 부정은 규칙으로 풀지 않는다
+_DOUBLE_NEG = re.compile(r"(?:끄|꺼|빼|제외|생략)[가-힣]*\s?지\s?(?:마|말)")
+# 부정처럼 보이지만 요청 동사에 묶이지 않은 말 ("안 좋은 날씨", "주소 없는 사진", "괜찮아서") → 규칙으로 단정하지 않는다
+_WEAK_NEG = re.compile(r"(?<![가-힣])(?:안|못)|않|없|됐|괜찮|싫")
+ALL_WORDS = ["둘 다", "둘다", "전부", "모두", "다 켜", "다 해", "다 뽑", "다 알려", "all"]
+# 조건/질문/위임 → 규칙으로 단정하지 않는다
+HEDGES = ["?", "할지", "말지", "말까", "상관없", "알아서", "나중에", "만약", "아니면"]
+
+_TOPIC_RX = re.compile("|".join(sorted((re.escape(k) for ks in TOPICS.values() for k in ks), key=len, reverse=True)))
+_TOPIC_OF = {k: t for t, ks in TOPICS.items() for k in ks}
+_CLAUSES = re.compile(r"[.,!\n;]+")
+_ONLY = re.compile(r"만(?!들)")   # "캡션만" (○) / "캡션 만들어" "캡션만들어" (×)
+
+
+def normalize_prompt(prompt: str) -> str:
+    s = unicodedata.normalize("NFKC", prompt or "").casefold()
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def _segments(clause: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """절 → (첫 주제 앞부분, [(주제, 주제 키워드부터 다음 주제 직전까지)])  — 한국어는 동사가 주제 뒤에 온다"""
+    ms = list(_TOPIC_RX.finditer(clause))
+    if not ms:
+        return clause, []
+    segs = []
+    for i, m in enumerate(ms):
+        end = ms[i + 1].start() if i + 1 < len(ms) else len(clause)
+        segs.append((_TOPIC_OF[m.group(0)], clause[m.start():end]))
+    return clause[:ms[0].start()], segs
+
+
+def _negated(text: str) -> Optional[bool]:
+    """요청 부정이 있으면 True, 없으면 False. 요청 동사에 안 묶인 부정어가 남아 있으면 None"""
+    if _WEAK_NEG.search(_NEG.sub(" ", text)):
+        return None
+    return bool(_NEG.search(text))
+
+
+def fast_plan(prompt: str) -> Optional[Dict[str, bool]]:
+    """
+    Plan 필드 dict (need_caption, need_exif, want_weather, want_address) 또는 None(확신 없음).
+    - 주제 키워드 뒤쪽(다음 주제 전까지)에 요청 부정("안 해도", "빼고", "됐어")이 있으면 끔, 없으면 켬
+    - 요청 동사에 묶이지 않은 부정어("안 좋은", "없는")가 있으면 None
+    - "X만" 이면 같은 단계(캡션/메타, 날씨/주소)의 언급 안 된 주제는 끔
+    - 언급 없는 주제는 켬 (LLM Planner 의 '명시가 없으면 True' 와 같은 기본값)
+    - 같은 주제를 켜고 끄는 말이 같이 있거나, 주제 없이 부정어/조건문/이중 부정이 있으면 None
+    """
+    text = normalize_prompt(prompt)
+    if not text:
+        return {"need_caption": True, "need_exif": True, "want_weather": True, "want_address": True}
+    if any(h in text for h in HEDGES) or _DOUBLE_NEG.search(text):
+        return None
+
+    pos: Set[str] = set()
+    neg: Set[str] = set()
+    only: Set[str] = set()
+    for clause in _CLAUSES.split(text):
+        head, segs = _segments(clause)
+        if _negated(head) is not False:
+            return None   # 무엇을 끄라는지 모르는 부정
+        for topic, seg in segs:
+            negated = _negated(seg)
+            if negated is None:
+                return None
+            (neg if negated else pos).add(topic)
+            kw = _TOPIC_RX.match(seg).group(0)
+            if not negated and _ONLY.match(seg, len(kw)):   # "캡션만 빼고" 는 '캡션만' 이 아니다
+                only.add(topic)
+
+    if pos & neg:
+        return None
+    if not pos and not neg and not any(w in text for w in ALL_WORDS):
+        return None   # 주제도 '전부'도 없는 요청 → LLM 에 맡긴다
+    if "exif" in neg and pos & set(SUB):
+        return None   # 메타는 끄면서 날씨/주소는 켜라는 요청
+
+    top_only = bool(only)                     # "날씨만" 도 캡션은 빼라는 뜻
+    sub_only = bool(only & set(SUB))
+
+    def on(topic: str, exclusive: bool) -> bool:
+        return topic in pos or (topic not in neg and not exclusive)
+
+    need_exif = on("exif", top_only and "exif" not in only) or bool(pos & set(SUB))
+    return {
+        "need_caption": on("caption", top_only and "caption" not in only),
+        "need_exif": need_exif,
+        "want_weather": need_exif and on("weather", sub_only),
+        "want_address": need_exif and on("address", sub_only),
+    }
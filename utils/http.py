@@ -0,0 +1,113 @@
+########################################
+# utils/http.py (공유 HTTP 클라이언트; 호스트별 keep-alive 커넥션 풀 + 기본 타임아웃 + 재사용 통계)
+########################################
+import os, time, threading
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "16"))   # 커넥션 풀을 유지할 호스트 수
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "8"))      # 호스트당 keep-alive 커넥션 수
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))       # timeout 을 안 준 요청의 기본값(초)
+
+_lock = threading.Lock()
+_stats: Dict[str, Any] = {"requests": 0, "new_connections": 0, "errors": 0, "hosts": {}}
+
+
+def _count(key: str, host: Optional[str] = None):
+    with _lock:
+        _stats[key] += 1
+        if host:
+            h = _stats["hosts"].setdefault(host, {"requests": 0, "new_connections": 0})
+            h[key] += 1
+
+
+class _CountingHTTPPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count("new_connections", self.host)
+        return super()._new_conn()
+
+
+class _CountingHTTPSPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count("new_connections", self.host)
+        return super()._new_conn()
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter + 기본 타임아웃 + 새 커넥션 수 집계.
+    새 TCP/TLS 연결은 urllib3 풀의 _new_conn 에서만 생기므로 거기서 세고,
+    요청 수와의 차이를 재사용(핸드셰이크 생략) 횟수로 본다.
+    """
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _CountingHTTPPool, "https": _CountingHTTPSPool}
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        _count("requests", requests.utils.urlparse(request.url).hostname)
+        try:
+            return super().send(request, **kwargs)
+        except requests.RequestException:
+            _count("errors")
+            raise
+
+
+def make_session(pool_hosts: int = HTTP_POOL_HOSTS, pool_size: int = HTTP_POOL_SIZE,
+                 timeout: float = HTTP_TIMEOUT) -> requests.Session:
+    s = requests.Session()
+    adapter = PooledAdapter(timeout=timeout, pool_connections=pool_hosts, pool_maxsize=pool_size)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+class RateLimiter:
+    """
+    초당 rate 회로 호출 간격을 맞춘다 (스레드 공유).
+    wait() 는 다음 빈 슬롯을 예약하고 그때까지 잔다 → 동시에 불러도 호출 간격이 1/rate 이상.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_session: Optional[requests.Session] = None
+
+
+def session() -> requests.Session:
+    """프로세스 공용 세션 (스레드에서 같이 써도 됨; 호스트별 풀이 커넥션을 나눠 준다)"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+
+def http_stats() -> Dict[str, Any]:
+    with _lock:
+        out = {k: (dict((h, dict(v)) for h, v in _stats["hosts"].items()) if k == "hosts" else v)
+               for k, v in _stats.items()}
+    out["reused"] = max(0, out["requests"] - out["new_connections"])
+    out["reuse_rate"] = round(out["reused"] / out["requests"], 4) if out["requests"] else 0.0
+    out.update({"pool_hosts": HTTP_POOL_HOSTS, "pool_size": HTTP_POOL_SIZE, "timeout": HTTP_TIMEOUT})
+    return out
@@ -0,0 +1,32 @@
+########################################
+# utils/image_prep.py (캡션 전처리; 축소 디코드 → 리사이즈 → JPEG data URL)
+########################################
+import io, base64
+from PIL import Image, ImageOps
+
+
+def reduced_jpeg_bytes(path: str, max_side: int, quality: int = 85) -> bytes:
+    """
+    긴 변이 max_side 이하인 RGB JPEG 바이트를 만든다 (EXIF 방향 보정 포함).
+    - JPEG 은 draft() 로 디코더의 DCT 축소(1/2, 1/4, 1/8)를 써서 목표 해상도 근처로 바로 디코드
+      → 12~48MP 원본을 풀해상도로 펼치지 않으므로 CPU 시간/피크 메모리가 크게 준다
+    - 남은 축소는 reduce() + BILINEAR (thumbnail 의 reducing_gap) 로 처리
+    - 방향 보정은 작아진 이미지에서 수행 (긴 변 기준이라 회전해도 max_side 는 그대로)
+    """
+    with Image.open(path) as src:
+        w, h = src.size
+        m = max(w, h)
+        if m > max_side:
+            r = max_side / m
+            src.draft("RGB", (int(w * r), int(h * r)))
+        im = src if src.mode == "RGB" else src.convert("RGB")
+        im.thumbnail((max_side, max_side), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        ImageOps.exif_transpose(im, in_place=True)
+        buf = io.BytesIO()
+        im.save(buf, format="JPEG", quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def to_jpeg_data_url(path: str, max_side: int, quality: int = 85) -> str:
+    b64 = base64.b64encode(reduced_jpeg_bytes(path, max_side, quality)).decode("utf-8")
+    return f"data:image/jpeg;base64,{b64}"
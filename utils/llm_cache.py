@@ -0,0 +1,125 @@
+########################################
+# utils/llm_cache.py (LLM 응답 캐시; 메모리 LRU + 디스크(DiskCache) 2단, 같은 요청이면 API 호출 생략)
+########################################
+import os, time, threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from utils.cache import DiskCache, make_key
+
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(6 * 3600)))   # 재시도/미리보기/중복 제출을 덮는 정도
+LLM_CACHE_MEM = int(os.getenv("LLM_CACHE_MEM", "256"))              # 프로세스 메모리 LRU 항목 수
+LLM_CACHE_MAX = int(os.getenv("LLM_CACHE_MAX", "20000"))            # 디스크 항목 수
+
+
+class LLMCache:
+    """
+    (model, temperature, system, user) → 응답 텍스트.
+    - 1단: 프로세스 메모리 OrderedDict LRU (만료 시각 같이 저장)
+    - 2단: CACHE_DIR/<name>.sqlite (서버 프로세스끼리 공유) — 디스크 적중은 메모리로 올림
+    """
+
+    def __init__(self, name: str = "llm", mem_entries: int = LLM_CACHE_MEM,
+                 max_entries: int = LLM_CACHE_MAX, ttl: float = LLM_CACHE_TTL):
+        self.ttl = ttl
+        self.mem_entries = max(0, mem_entries)
+        self.disk = DiskCache(name, max_entries=max_entries, ttl=ttl)
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"mem_hits": 0, "disk_hits": 0, "misses": 0, "bypass": 0}
+
+    @staticmethod
+    def key(model: str, temperature: float, system: str, user: str) -> str:
+        return make_key("chat", model, float(temperature), system, user)
+
+    def _remember(self, key: str, text: str):
+        if not self.mem_entries:
+            return
+        with self._lock:
+            self._mem[key] = (time.time() + self.ttl, text)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.mem_entries:
+                self._mem.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                if hit[0] >= time.time():
+                    self._mem.move_to_end(key)
+                    self._stats["mem_hits"] += 1
+                    return hit[1]
+                del self._mem[key]
+        text = self.disk.get(key)
+        with self._lock:
+            self._stats["disk_hits" if text is not None else "misses"] += 1
+        if text is not None:
+            self._remember(key, text)
+        return text
+
+    def bypass(self):
+        """캐시를 건너뛴 호출 수 (no_cache)"""
+        with self._lock:
+            self._stats["bypass"] += 1
+
+    def set(self, key: str, text: str):
+        self._remember(key, text)
+        self.disk.set(key, text)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["mem_size"] = len(self._mem)
+        lookups = out["mem_hits"] + out["disk_hits"] + out["misses"]
+        out["hit_rate"] = round((out["mem_hits"] + out["disk_hits"]) / lookups, 4) if lookups else 0.0
+        out.update({"mem_entries": self.mem_entries, "ttl": self.ttl, "disk": self.disk.stats()})
+        return out
+
+
+def _join(messages: List[Dict[str, str]], role: str) -> str:
+    return "\n".join(m.get("content", "") for m in messages if m.get("role") == role)
+
+
+def cached_chat(client, cache: LLMCache, model: str, messages: List[Dict[str, str]],
+                temperature: float, no_cache: bool = False) -> str:
+    """
+    chat.completions.create 결과 텍스트 (캐시 적중 시 API 호출 없음).
+    no_cache=True 면 캐시를 읽지 않고 새로 호출한 뒤 결과로 캐시를 갱신한다.
+    """
+    key = LLMCache.key(model, temperature, _join(messages, "system"), _join(messages, "user"))
+    if no_cache:
+        cache.bypass()
+    else:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    resp = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+    text = resp.choices[0].message.content or ""
+    cache.set(key, text)
+    return text
+
+
+async def cached_chat_stream(aclient, cache: LLMCache, model: str, messages: List[Dict[str, str]],
+                             temperature: float, on_delta: Callable[[str], Awaitable[None]],
+                             no_cache: bool = False) -> str:
+    """
+    cached_chat 의 스트리밍 버전: 토큰 조각이 올 때마다 on_delta(조각) 을 부르고 전체 텍스트를 돌려준다.
+    캐시 적중이면 전체 텍스트를 한 조각으로 바로 넘긴다. 다 받은 결과만 캐시에 저장.
+    """
+    key = LLMCache.key(model, temperature, _join(messages, "system"), _join(messages, "user"))
+    if no_cache:
+        cache.bypass()
+    else:
+        hit = cache.get(key)
+        if hit is not None:
+            await on_delta(hit)
+            return hit
+    stream = await aclient.chat.completions.create(model=model, messages=messages, temperature=temperature, stream=True)
+    parts: List[str] = []
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            await on_delta(delta)
+    text = "".join(parts)
+    cache.set(key, text)
+    return text
@@ -0,0 +1,269 @@
+########################################
+# utils/mcp_pool.py (MCP 세션 풀; 서버 스크립트별 warm ClientSession 재사용)
+########################################
+import asyncio, os, sys, threading, importlib.util
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Optional, Dict, Any, List, Iterable, Set
+import anyio
+from mcp.client.session import ClientSession
+from mcp.client.stdio import stdio_client, StdioServerParameters
+from mcp.shared.memory import create_client_server_memory_streams
+
+# 같은 프로세스에서 돌릴 서버 label (caption, exif, mbti, playlist ...). 콤마 구분.
+# I/O 없는 가벼운 서버 전용: in-process 에서는 동기 tool 이 호출자 루프를 그대로 막는다.
+MCP_INPROCESS = os.getenv("MCP_INPROCESS", "mbti")
+
+
+# ---------- in-process 전송 ----------
+def server_label(server_py: str) -> str:
+    """servers/mbti_server.py → mbti"""
+    stem = os.path.splitext(os.path.basename(server_py))[0]
+    return stem[:-len("_server")] if stem.endswith("_server") else stem
+
+
+def inprocess_labels(spec: Optional[str] = None) -> Set[str]:
+    return {x.strip() for x in (MCP_INPROCESS if spec is None else spec).split(",") if x.strip()}
+
+
+_APPS: Dict[str, Any] = {}
+
+def load_server_app(server_py: str):
+    """서버 스크립트를 모듈로 import 해서 FastMCP app 객체를 꺼낸다 (스크립트당 1회)."""
+    path = os.path.abspath(server_py)
+    if path not in _APPS:
+        root = os.path.dirname(os.path.dirname(path))  # servers/ 와 utils/ 가 같은 레벨
+        if root not in sys.path:
+            sys.path.insert(0, root)
+        spec = importlib.util.spec_from_file_location(f"_inproc_{server_label(path)}_server", path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        _APPS[path] = getattr(mod, "app")
+    return _APPS[path]
+
+
+@asynccontextmanager
+async def inprocess_client(server_py: str):
+    """
+    stdio_client 대응물: FastMCP app 을 같은 프로세스에서 돌리고 메모리 스트림으로 붙인다.
+    (read, write) 를 내주므로 그 위에 ClientSession 을 그대로 올리면 된다.
+    """
+    server = load_server_app(server_py)._mcp_server
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(lambda: server.run(server_streams[0], server_streams[1],
+                                             server.create_initialization_options(), raise_exceptions=False))
+            try:
+                yield client_streams
+            finally:
+                tg.cancel_scope.cancel()
+
+
+class SessionHandle:
+    """
+    서버 하나(서브프로세스 또는 in-process app) + ClientSession 하나의 수명을 소유하는 핸들.
+    stdio_client/ClientSession 컨텍스트는 들어간 태스크에서 나와야 하므로(anyio cancel scope)
+    전용 owner 태스크가 컨텍스트를 열고, close 신호가 올 때까지 붙잡고 있는다.
+    """
+
+    def __init__(self, params: StdioServerParameters, inprocess: bool = False):
+        self.params = params
+        self.inprocess = inprocess
+        self.session: Optional[ClientSession] = None
+        self.error: Optional[BaseException] = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self, timeout: Optional[float] = None) -> ClientSession:
+        self._task = asyncio.create_task(self._own())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await self.aclose()
+            raise
+        if self.session is None:
+            raise RuntimeError(f"MCP 세션 시작 실패({self.params.args}): {self.error}")
+        return self.session
+
+    def _transport(self):
+        server_py = self.params.args[0]
+        if self.inprocess:
+            try:
+                load_server_app(server_py)
+                return inprocess_client(server_py)
+            except Exception as e:
+                print(f"[warn] in-process 로드 실패({server_py}) → 서브프로세스로 실행: {e}", file=sys.stderr)
+                self.inprocess = False
+        return stdio_client(self.params)
+
+    async def _own(self):
+        try:
+            async with AsyncExitStack() as stack:
+                read, write = await stack.enter_async_context(self._transport())
+                sess = ClientSession(read, write)
+                await stack.enter_async_context(sess)
+                await sess.initialize()
+                self.session = sess
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def aclose(self):
+        self._closing.set()
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._task, timeout=5.0)
+            except (asyncio.TimeoutError, asyncio.CancelledError, Exception):
+                self._task.cancel()
+
+
+class _ServerSlot:
+    """서버 스크립트 하나에 대한 idle 세션 목록 + 현재 살아있는 세션 수"""
+
+    def __init__(self):
+        self.idle: List[SessionHandle] = []
+        self.size = 0
+        self.cond = asyncio.Condition()
+
+
+class MCPSessionPool:
+    """
+    서버 스크립트(caption_server.py, exif_server.py ...)별로 warm 세션을 유지하는 풀.
+    - 서버당 최대 max_sessions 개까지 세션을 띄워 동시 호출자에게 나눠준다.
+    - 호출 중 세션이 죽으면(프로세스 종료/파이프 끊김) 버리고 새 세션으로 1회 재시도한다.
+    - 풀은 전용 이벤트 루프 스레드에서 돈다 → asyncio.run 을 여러 번 돌리는 호출자끼리도 공유 가능.
+    - inprocess 에 든 서버 label 은 서브프로세스 대신 같은 프로세스에서 메모리 스트림으로 붙는다.
+    """
+
+    def __init__(self, env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None,
+                 max_sessions: int = 2, start_timeout: float = 30.0, inprocess: Optional[Iterable[str]] = None):
+        self.env = env
+        self.inprocess = set(inprocess) if inprocess is not None else inprocess_labels()
+        self.cwd = cwd or os.getcwd()
+        self.max_sessions = max(1, int(max_sessions))
+        self.start_timeout = start_timeout
+        self._slots: Dict[str, _ServerSlot] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"spawned": 0, "reused": 0, "restarted": 0, "calls": 0}
+
+    # ---------- 전용 루프 ----------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-pool", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def _submit(self, coro):
+        """코루틴을 풀 루프에서 실행하고, 호출자 루프에서 결과를 기다린다."""
+        fut = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return await asyncio.wrap_future(fut)
+
+    # ---------- 세션 대여/반납 (풀 루프 안에서만 호출) ----------
+    def _params(self, server_py: str) -> StdioServerParameters:
+        return StdioServerParameters(command=sys.executable, args=[server_py], cwd=self.cwd, env=self.env)
+
+    async def _acquire(self, server_py: str) -> SessionHandle:
+        slot = self._slots.setdefault(server_py, _ServerSlot())
+        async with slot.cond:
+            while True:
+                while slot.idle:
+                    h = slot.idle.pop()
+                    if h.alive:
+                        self.stats["reused"] += 1
+                        return h
+                    slot.size -= 1
+                if slot.size < self.max_sessions:
+                    slot.size += 1
+                    break
+                await slot.cond.wait()
+        h = SessionHandle(self._params(server_py), inprocess=server_label(server_py) in self.inprocess)
+        try:
+            await h.start(timeout=self.start_timeout)
+        except BaseException:
+            async with slot.cond:
+                slot.size -= 1
+                slot.cond.notify()
+            raise
+        self.stats["spawned"] += 1
+        return h
+
+    async def _release(self, server_py: str, h: SessionHandle, broken: bool = False):
+        slot = self._slots[server_py]
+        async with slot.cond:
+            if broken or not h.alive:
+                slot.size -= 1
+            else:
+                slot.idle.append(h)
+            slot.cond.notify()
+        if broken or not h.alive:
+            asyncio.create_task(h.aclose())
+
+    async def _call(self, server_py: str, tool_name: str, arguments: Dict[str, Any], timeout: float):
+        self.stats["calls"] += 1
+        for attempt in range(2):
+            h = await self._acquire(server_py)
+            try:
+                res = await asyncio.wait_for(h.session.call_tool(tool_name, arguments), timeout=timeout)
+            except asyncio.TimeoutError:
+                # 응답이 뒤늦게 올 수 있는 세션은 재사용하지 않는다
+                await self._release(server_py, h, broken=True)
+                raise
+            except Exception:
+                await self._release(server_py, h, broken=True)
+                if attempt == 0:
+                    self.stats["restarted"] += 1
+                    continue
+                raise
+            except BaseException:
+                # 호출자 취소(CancelledError) 등: 응답 도착 여부를 모르니 버리고 자리(slot.size)를 돌려준다
+                await asyncio.shield(self._release(server_py, h, broken=True))
+                raise
+            await self._release(server_py, h)
+            return res
+
+    async def _warmup(self, server_py: str, n: int):
+        handles = await asyncio.gather(*[self._acquire(server_py) for _ in range(min(n, self.max_sessions))])
+        for h in handles:
+            await self._release(server_py, h)
+
+    async def _aclose(self):
+        for slot in self._slots.values():
+            async with slot.cond:
+                idle, slot.idle, slot.size = slot.idle, [], 0
+            await asyncio.gather(*[h.aclose() for h in idle], return_exceptions=True)
+        self._slots.clear()
+
+    # ---------- 공개 API (어느 루프/스레드에서든 호출 가능) ----------
+    async def call_tool(self, server_py: str, tool_name: str, arguments: Dict[str, Any], timeout: float = 20.0):
+        """풀의 warm 세션으로 tool 호출 → CallToolResult"""
+        return await self._submit(self._call(server_py, tool_name, arguments, timeout))
+
+    async def warmup(self, server_py: str, n: int = 1):
+        """첫 호출 지연을 없애기 위해 세션을 미리 띄워 둔다."""
+        await self._submit(self._warmup(server_py, n))
+
+    async def aclose(self):
+        if self._loop is not None:
+            await self._submit(self._aclose())
+
+    def close(self):
+        """모든 세션을 닫고 풀 루프 스레드를 멈춘다 (루프 밖에서 호출)."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._aclose(), self._loop).result(timeout=30)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
@@ -0,0 +1,122 @@
+########################################
+# utils/mcp_startup.py (필요한 서버만 병렬로 기동 + 기동 시간 리포트)
+########################################
+import asyncio, os, sys, time
+from typing import Optional, Dict, List, Iterable
+from mcp.client.session import ClientSession
+from mcp.client.stdio import StdioServerParameters
+from utils.mcp_pool import SessionHandle, inprocess_labels
+
+SERVER_SCRIPTS: Dict[str, str] = {
+    "caption": "servers/caption_server.py",
+    "playlist": "servers/playlist_server.py",
+    "trackinfo": "servers/trackinfo_server.py",
+    "mbti": "servers/mbti_server.py",
+    "diary": "servers/diary_server.py",
+    "exif": "servers/exif_server.py",
+    "synth": "servers/synth_server.py",
+}
+
+
+def required_servers(image: Optional[str] = None, playlist: Optional[str] = None, mbti: Optional[str] = None,
+                     diary: Optional[str] = None, synth: bool = True) -> List[str]:
+    """CLI 입력으로부터 이번 실행에 필요한 서버 label 목록을 구한다."""
+    need: List[str] = []
+    if image and os.path.isfile(image):
+        need += ["caption", "exif"]
+    if playlist:
+        spotify = "open.spotify.com/playlist" in playlist or playlist.startswith("spotify:playlist:")
+        need.append("playlist" if spotify else "trackinfo")
+    if mbti:
+        need.append("mbti")
+    if diary:
+        need.append("diary")
+    if synth:
+        need.append("synth")
+    return need
+
+
+class ServerManager:
+    """
+    서버를 label 단위로 띄우는 기동 관리자.
+    - start(labels): 필요한 서버들을 동시에 기동 시작 (기다리지 않음)
+    - get(label): 해당 서버 세션을 기다려 돌려줌; 아직 시작 전이면 그때 기동(lazy)
+    - 요청되지 않은 서버는 아예 띄우지 않는다
+    - 서버별 기동 시간을 timings 에 기록하고 stderr 로 알린다
+    - inprocess 에 든 label 은 같은 프로세스에 로드해 메모리 스트림으로 붙는다 (기본: MCP_INPROCESS)
+    """
+
+    def __init__(self, scripts: Optional[Dict[str, str]] = None, env: Optional[Dict[str, str]] = None,
+                 cwd: Optional[str] = None, start_timeout: float = 30.0, verbose: bool = True,
+                 inprocess: Optional[Iterable[str]] = None):
+        self.scripts = scripts or SERVER_SCRIPTS
+        self.inprocess = set(inprocess) if inprocess is not None else inprocess_labels()
+        self.env = env if env is not None else os.environ.copy()
+        self.cwd = cwd or os.getcwd()
+        self.start_timeout = start_timeout
+        self.verbose = verbose
+        self.timings: Dict[str, float] = {}
+        self.failed: List[str] = []
+        self._handles: Dict[str, SessionHandle] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def _log(self, msg: str):
+        if self.verbose:
+            print(msg, file=sys.stderr)
+
+    async def _start_one(self, label: str) -> Optional[ClientSession]:
+        path = self.scripts[label]
+        if not os.path.exists(path):
+            self._log(f"[warn] 서버 스크립트 없음({path}) → {label} 제외")
+            return None
+        params = StdioServerParameters(command=sys.executable, args=[path], cwd=self.cwd, env=self.env)
+        h = SessionHandle(params, inprocess=label in self.inprocess)
+        self._handles[label] = h
+        t = time.perf_counter()
+        try:
+            sess = await h.start(timeout=self.start_timeout)
+        except Exception as e:
+            self._log(f"[warn] 서버 스폰 실패({path}): {e}")
+            self.failed.append(label)
+            return None
+        finally:
+            self.timings[label] = time.perf_counter() - t
+        self._log(f"[startup] {label} {self.timings[label]:.2f}s" + (" (in-process)" if h.inprocess else ""))
+        return sess
+
+    def start(self, labels: Iterable[str]):
+        for label in labels:
+            if label in self.scripts and label not in self._tasks:
+                self._tasks[label] = asyncio.create_task(self._start_one(label))
+
+    async def get(self, label: str, required: bool = False) -> Optional[ClientSession]:
+        self.start([label])
+        task = self._tasks.get(label)
+        sess = await task if task else None
+        if sess is None and required:
+            raise RuntimeError(f"{label} 서버를 사용할 수 없습니다.")
+        return sess
+
+    async def wait_all(self) -> Dict[str, ClientSession]:
+        """지금까지 시작된 서버를 전부 기다려 살아있는 세션만 돌려준다."""
+        labels = list(self._tasks)
+        sessions = await asyncio.gather(*[self._tasks[l] for l in labels])
+        return {l: s for l, s in zip(labels, sessions) if s is not None}
+
+    def report(self) -> str:
+        started = ", ".join(f"{l}{'(failed)' if l in self.failed else ''} {t:.2f}s" for l, t in sorted(self.timings.items(), key=lambda kv: -kv[1]))
+        skipped = [l for l in self.scripts if l not in self._tasks]
+        return f"[startup] {started or '-'}" + (f" (skipped: {', '.join(skipped)})" if skipped else "")
+
+    async def aclose(self):
+        for t in self._tasks.values():
+            if not t.done():
+                t.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        await asyncio.gather(*[h.aclose() for h in self._handles.values()], return_exceptions=True)
@@ -0,0 +1,90 @@
+########################################
+# utils/mood.py (공유 분위기 분류 엔진; 키워드 표를 한 번 컴파일해 두고 라벨별 점수를 한 번에 계산)
+########################################
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MOOD_LABELS = ["파티", "신나는", "격동적인", "밝고경쾌", "잔잔한", "우울/차분"]
+DEFAULT_LABEL = "잔잔한"
+_MEMO_MAX_LEN = 256   # 이 길이 이하 문자열(장르명 등)은 결과를 메모이즈
+
+
+class MoodMatcher:
+    """
+    {label: [keyword, ...]} → 분류기 (import 시 한 번 생성해서 공유).
+    - 점수 = 라벨별로 텍스트에 (부분 문자열로) 들어 있는 서로 다른 키워드 수
+      (기존 `for key in table: if key in text` 루프와 같은 결과)
+    - 생성 시 키워드를 소문자/중복 제거한 평탄한 (keyword, 라벨 번호들) 표로 컴파일
+    - 텍스트는 한 번만 소문자화하고 표를 한 번 돈다; 부분 문자열 검사는 C 구현 `in` 에 맡긴다
+      (정규식 교대/전방탐색으로 한 번에 훑는 방식은 위치마다 파이썬 re 엔진이 돌아서 수십 배 느렸다)
+    - 배치 API 는 같은 문자열을 한 번만 채점 (장르처럼 값 종류가 적은 입력에서 큰 차이)
+    - 동점이면 labels 순서가 앞선 라벨
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]], labels: Optional[List[str]] = None,
+                 default: str = DEFAULT_LABEL):
+        self.labels = list(labels or keywords.keys())
+        for label in keywords:
+            if label not in self.labels:
+                self.labels.append(label)
+        self.default = default
+        index = {label: i for i, label in enumerate(self.labels)}
+        table: Dict[str, List[int]] = {}
+        for label, kws in keywords.items():
+            for kw in kws:
+                table.setdefault(kw.lower(), []).append(index[label])
+        self._table: Tuple[Tuple[str, Tuple[int, ...]], ...] = tuple((k, tuple(v)) for k, v in table.items())
+        self._memo = lru_cache(maxsize=65536)(self._vector)
+
+    @classmethod
+    def from_map(cls, table: Dict[str, str], labels: Optional[List[str]] = None,
+                 default: str = DEFAULT_LABEL) -> "MoodMatcher":
+        """{keyword: label} 형태의 표에서 생성 (GENRE_TO_MOOD 같은 것)"""
+        inv: Dict[str, List[str]] = {}
+        for kw, label in table.items():
+            inv.setdefault(label, []).append(kw)
+        return cls(inv, labels=labels, default=default)
+
+    def _vector(self, low: str) -> Tuple[int, ...]:
+        v = [0] * len(self.labels)
+        for idxs in [idxs for kw, idxs in self._table if kw in low]:
+            for i in idxs:
+                v[i] += 1
+        return tuple(v)
+
+    def vector(self, text: str) -> Tuple[int, ...]:
+        """labels 순서의 점수 튜플"""
+        low = (text or "").lower()
+        return self._memo(low) if len(low) <= _MEMO_MAX_LEN else self._vector(low)
+
+    def scores(self, text: str) -> Dict[str, int]:
+        return dict(zip(self.labels, self.vector(text)))
+
+    def scores_many(self, texts: Iterable[str]) -> List[Dict[str, int]]:
+        texts = list(texts)
+        uniq = {t: self._vector((t or "").lower()) for t in set(texts)}
+        return [dict(zip(self.labels, uniq[t])) for t in texts]
+
+    def total(self, texts: Iterable[str]) -> Dict[str, int]:
+        """여러 텍스트 점수의 합 (장르 목록 → 플레이리스트 전체 점수). 같은 문자열은 한 번만 채점."""
+        return self.total_counts(Counter(texts))
+
+    def total_counts(self, counts: Dict[str, int]) -> Dict[str, int]:
+        """{텍스트: 등장 횟수} → 점수 합 (목록을 들고 있지 않고 개수만 센 경우)"""
+        acc = [0] * len(self.labels)
+        for t, n in counts.items():
+            for i, s in enumerate(self._vector((t or "").lower())):
+                if s:
+                    acc[i] += s * n
+        return dict(zip(self.labels, acc))
+
+    def best(self, scores: Dict[str, int]) -> str:
+        label = max(self.labels, key=lambda lab: scores.get(lab, 0))
+        return label if scores.get(label, 0) > 0 else self.default
+
+    def classify(self, text: str) -> str:
+        return self.best(self.scores(text))
+
+    def classify_many(self, texts: Iterable[str]) -> List[str]:
+        return [self.best(s) for s in self.scores_many(texts)]
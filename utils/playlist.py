@@ -1,17 +1,20 @@
 ########################################
 # utils/playlist.py (공유)
 ########################################
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import statistics
+from utils.mood import MoodMatcher, MOOD_LABELS
 
+# 규칙은 `&` 로 묶어 스칼라(label_mood)와 NumPy 배열(analyze_feature_sets) 양쪽에서 그대로 쓴다
 MOOD_RULES = [
-    ("파티", lambda e,v,d,t: e>0.7 and d>0.7 and t>120),
-    ("신나는", lambda e,v,d,t: e>0.6 and v>0.6),
-    ("격동적인", lambda e,v,d,t: e>0.75 and v<0.45),
-    ("밝고경쾌", lambda e,v,d,t: v>0.7 and d>0.6),
-    ("잔잔한", lambda e,v,d,t: e<0.4 and t<100),
-    ("우울/차분", lambda e,v,d,t: v<0.35 and e<0.5),
+    ("파티", lambda e,v,d,t: (e>0.7) & (d>0.7) & (t>120)),
+    ("신나는", lambda e,v,d,t: (e>0.6) & (v>0.6)),
+    ("격동적인", lambda e,v,d,t: (e>0.75) & (v<0.45)),
+    ("밝고경쾌", lambda e,v,d,t: (v>0.7) & (d>0.6)),
+    ("잔잔한", lambda e,v,d,t: (e<0.4) & (t<100)),
+    ("우울/차분", lambda e,v,d,t: (v<0.35) & (e<0.5)),
 ]
+FEATURE_DEFAULTS = {"energy": 0.5, "valence": 0.5, "danceability": 0.5, "tempo": 110}
 DEFAULT_LABEL = "잔잔한"
 
 # 텍스트 장르 기반 간이 매핑 규칙
@@ -42,15 +45,14 @@ GENRE_TO_MOOD = {
     "emo": "우울/차분",
 }
 
+GENRE_MATCHER = MoodMatcher.from_map(GENRE_TO_MOOD, labels=MOOD_LABELS, default=DEFAULT_LABEL)
+
 def mood_from_genres(genres: List[str]) -> str:
-    score = {"파티":0,"신나는":0,"격동적인":0,"밝고경쾌":0,"잔잔한":0,"우울/차분":0}
-    for g in genres:
-        g_low = g.lower()
-        for key,lab in GENRE_TO_MOOD.items():
-            if key in g_low:
-                score[lab]+=1
-    label = max(score, key=score.get)
-    return label if score[label]>0 else DEFAULT_LABEL
+    return GENRE_MATCHER.best(GENRE_MATCHER.total(genres))
+
+def mood_from_genre_counts(counts: Dict[str, int]) -> str:
+    """{장르: 곡 수} 로 mood_from_genres 와 같은 판정"""
+    return GENRE_MATCHER.best(GENRE_MATCHER.total_counts(counts))
 
 
 def _avg(xs: List[float]) -> float:
@@ -73,4 +75,47 @@ def label_mood(stats: Dict[str,float]) -> str:
     for name,rule in MOOD_RULES:
         if rule(e,v,d,t):
             return name
-    return DEFAULT_LABEL
\ No newline at end of file
+    return DEFAULT_LABEL
+
+
+def feature_columns(playlists: List[List[Dict[str, Any]]]):
+    """트랙 dict 목록들 → (플레이리스트별 트랙 수, {피처: 전 트랙을 이어 붙인 float64 배열})"""
+    import numpy as np
+
+    lengths = np.array([len(p) for p in playlists], dtype=np.int64)
+    flat = [t for p in playlists for t in p]
+    cols = {key: np.array([t.get(key, default) for t in flat], dtype=np.float64)
+            for key, default in FEATURE_DEFAULTS.items()}
+    return lengths, cols
+
+
+def analyze_columns(lengths, cols) -> List[Tuple[str, Dict[str, float]]]:
+    """
+    열 단위 입력에서 플레이리스트별 평균 + 라벨 (summarize_features + label_mood 의 NumPy 버전).
+    - np.add.reduceat 으로 구간 합 → 트랙 수로 나눠 평균 (빈 플레이리스트는 summarize_features 처럼 0.0)
+    - MOOD_RULES 를 불리언 마스크로 평가, 앞선 규칙이 이기도록 뒤에서부터 덮어쓴다
+    """
+    import numpy as np
+
+    lengths = np.asarray(lengths, dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    nonempty = lengths > 0
+    means: Dict[str, Any] = {}
+    for key in FEATURE_DEFAULTS:
+        m = np.zeros(len(lengths))
+        if nonempty.any():
+            m[nonempty] = np.add.reduceat(np.asarray(cols[key], dtype=np.float64), starts[nonempty]) / lengths[nonempty]
+        means[key] = m
+
+    e, v, d, t = means["energy"], means["valence"], means["danceability"], means["tempo"]
+    labels = np.full(len(lengths), DEFAULT_LABEL, dtype=object)
+    for name, rule in reversed(MOOD_RULES):
+        labels[rule(e, v, d, t)] = name
+    rows = np.column_stack([e, v, d, t]).tolist()
+    return [(lab, {"energy": r[0], "valence": r[1], "danceability": r[2], "tempo": r[3]})
+            for lab, r in zip(labels.tolist(), rows)]
+
+
+def analyze_feature_sets(playlists: List[List[Dict[str, Any]]]) -> List[Tuple[str, Dict[str, float]]]:
+    """여러 플레이리스트를 한 번에 → [(label, stats), ...] (입력 순서)"""
+    return analyze_columns(*feature_columns(playlists))
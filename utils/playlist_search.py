@@ -1,6 +1,11 @@
-import requests, re
-from bs4 import BeautifulSoup
-from typing import List, Dict
+import os, re, time, html
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import List, Dict, Iterator, Optional, Tuple
+from utils.http import session as http_session
+from utils.mood import MoodMatcher
+from utils.cache import DiskCache
+from utils.track_lookup import track_key
 
 # 간단한 웹 스크래핑 기반 음악 분위기 추론기
 # 실제 서비스에서는 API 사용 권장 (예: Last.fm, Spotify, MusicBrainz)
@@ -15,29 +20,52 @@ MOOD_KEYWORDS = {
 }
 
 DEFAULT_LABEL = "잔잔한"
+# 페이지 텍스트를 한 번만 훑어 라벨별 키워드 적중 수를 센다 (동점이면 MOOD_KEYWORDS 순서)
+TEXT_MATCHER = MoodMatcher(MOOD_KEYWORDS, default=DEFAULT_LABEL)
 
+SEARCH_CONCURRENCY = int(os.getenv("SONG_MOOD_CONCURRENCY", "4"))   # 동시 검색 수
+MOOD_CACHE = DiskCache(
+    "song_mood",
+    max_entries=int(os.getenv("SONG_MOOD_CACHE_MAX", "100000")),
+    ttl=float(os.getenv("SONG_MOOD_CACHE_TTL", str(30 * 24 * 3600))),
+)
 
-def search_song_mood(title: str, artist: str = "") -> str:
+# DOM 을 만들지 않고 본문 텍스트만: script/style 통째 제거 → 태그 제거 → 엔티티 복원
+_DROP_BLOCKS = re.compile(r"<(script|style|noscript|svg)\b.*?</\1\s*>", re.S | re.I)
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def html_text(page: str) -> str:
+    return html.unescape(_TAGS.sub(" ", _DROP_BLOCKS.sub(" ", page)))
+
+
+def _search_song_mood_upstream(title: str, artist: str = "") -> Optional[str]:
+    """검색 결과 페이지로 분위기 추론. 요청 실패 시 None (캐시하지 않음)."""
     query = f"{title} {artist} song mood"
-    url = f"https://www.google.com/search?q={requests.utils.quote(query)}"
     headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        r = requests.get(url, headers=headers, timeout=5)
+        r = http_session().get("https://www.google.com/search", params={"q": query}, headers=headers, timeout=5)
         if not r.ok:
-            return DEFAULT_LABEL
-        soup = BeautifulSoup(r.text, "html.parser")
-        text = soup.get_text(" ", strip=True).lower()
-        for label, keywords in MOOD_KEYWORDS.items():
-            for kw in keywords:
-                if kw in text:
-                    return label
+            return None
+        return TEXT_MATCHER.classify(html_text(r.text))
     except Exception:
+        return None
+
+
+def search_song_mood(title: str, artist: str = "") -> str:
+    key = track_key(artist, title)
+    hit = MOOD_CACHE.get(key)
+    if hit is not None:
+        return hit
+    mood = _search_song_mood_upstream(title, artist)
+    if mood is None:
         return DEFAULT_LABEL
-    return DEFAULT_LABEL
+    MOOD_CACHE.set(key, mood)
+    return mood
 
 
-def analyze_textfile_tracks(path: str) -> List[Dict[str,str]]:
-    tracks = []
+def iter_track_lines(path: str) -> Iterator[Tuple[str, str]]:
+    """파일을 한 줄씩 읽어 (artist, title) 을 흘려준다 (파일 전체를 메모리에 올리지 않음)"""
     with open(path, "r", encoding="utf-8") as f:
         for line in f:
             if not line.strip():
@@ -46,6 +74,50 @@ def analyze_textfile_tracks(path: str) -> List[Dict[str,str]]:
                 artist, title = [x.strip() for x in line.split("-",1)]
             else:
                 artist, title = "", line.strip()
-            mood = search_song_mood(title, artist)
-            tracks.append({"artist":artist,"title":title,"mood":mood})
-    return tracks
\ No newline at end of file
+            yield artist, title
+
+
+def iter_textfile_moods(path: str, concurrency: int = SEARCH_CONCURRENCY, deadline: Optional[float] = None,
+                        limit: Optional[int] = None, state: Optional[Dict[str, bool]] = None) -> Iterator[Dict[str, str]]:
+    """
+    {"artist","title","mood"} 를 파일 순서대로 흘려준다.
+    - 검색은 스레드 풀에서 concurrency 개씩, 진행 중 작업은 concurrency*2 개로 묶어 메모리 일정
+    - deadline(초): 넘기면 그때까지 순서대로 끝난 곡까지만 내보내고 멈춤 (남은 검색은 취소)
+    - limit: 앞에서부터 limit 곡만
+    - state 를 넘기면 끝까지 다 읽었는지 state["complete"] 에 남긴다
+    """
+    state = state if state is not None else {}
+    state["complete"] = False
+    end = time.monotonic() + deadline if deadline else None
+    lines = iter_track_lines(path)
+    window: deque = deque()
+    ex = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        truncated = False
+        for n, (artist, title) in enumerate(lines):
+            if limit is not None and n >= limit:
+                truncated = True
+                break
+            window.append((artist, title, ex.submit(search_song_mood, title, artist)))
+            if len(window) >= concurrency * 2:
+                artist0, title0, fut = window.popleft()
+                yield {"artist": artist0, "title": title0,
+                       "mood": fut.result(timeout=max(0.0, end - time.monotonic()) if end else None)}
+        while window:
+            artist0, title0, fut = window.popleft()
+            yield {"artist": artist0, "title": title0,
+                   "mood": fut.result(timeout=max(0.0, end - time.monotonic()) if end else None)}
+        state["complete"] = not truncated
+    except FutureTimeout:
+        return
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+
+
+def analyze_textfile_tracks(path: str, concurrency: int = SEARCH_CONCURRENCY, deadline: Optional[float] = None,
+                            limit: Optional[int] = None, state: Optional[Dict[str, bool]] = None) -> List[Dict[str,str]]:
+    return list(iter_textfile_moods(path, concurrency, deadline, limit, state))
+
+
+def mood_cache_stats() -> Dict[str, object]:
+    return MOOD_CACHE.stats()
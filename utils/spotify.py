@@ -0,0 +1,77 @@
+########################################
+# utils/spotify.py (Spotify 플레이리스트 → 트랙 피처; 페이지 병렬 조회 + 벌크 audio_features + 트랙별 캐시)
+########################################
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from utils.cache import DiskCache
+
+SPOTIFY_WORKERS = int(os.getenv("SPOTIFY_WORKERS", "4"))   # 페이지/청크 동시 요청 수
+PAGE_SIZE = 100          # playlist_items 최대 limit
+FEATURES_CHUNK = 100     # audio_features 한 번에 보낼 수 있는 최대 id 수
+FEATURE_KEYS = ("energy", "valence", "danceability", "tempo")
+# 플레이리스트 항목에 트랙 이름/아티스트가 같이 오므로 트랙별 조회(sp.track)가 필요 없다
+ITEM_FIELDS = "total,items(track(id,name,artists(name)))"
+
+FEATURE_CACHE = DiskCache(
+    "spotify_features",
+    max_entries=int(os.getenv("SPOTIFY_FEATURE_CACHE_MAX", "200000")),
+    ttl=float(os.getenv("SPOTIFY_FEATURE_CACHE_TTL", str(90 * 24 * 3600))),   # 오디오 피처는 거의 안 바뀐다
+)
+
+
+def playlist_id(url: str) -> str:
+    return url.split("playlist/")[-1].split("?")[0]
+
+
+def playlist_tracks(sp, pl_id: str, workers: int = SPOTIFY_WORKERS) -> List[Dict[str, Any]]:
+    """플레이리스트 전체 트랙 [{id, name, artist}] (첫 페이지로 total 을 알고 나머지 페이지는 병렬)"""
+    def page(offset: int) -> Dict[str, Any]:
+        return sp.playlist_items(pl_id, fields=ITEM_FIELDS, limit=PAGE_SIZE, offset=offset,
+                                 additional_types=["track"])
+
+    first = page(0)
+    pages = [first]
+    offsets = range(PAGE_SIZE, int(first.get("total") or 0), PAGE_SIZE)
+    if offsets:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            pages += list(ex.map(page, offsets))
+    out = []
+    for p in pages:
+        for it in p.get("items") or []:
+            tr = it.get("track") or {}
+            if tr.get("id"):
+                out.append({"id": tr["id"], "name": tr.get("name", ""),
+                            "artist": ", ".join(a.get("name", "") for a in tr.get("artists") or [])})
+    return out
+
+
+def audio_features(sp, ids: List[str], workers: int = SPOTIFY_WORKERS) -> Dict[str, Dict[str, float]]:
+    """id → {energy, valence, danceability, tempo}. 캐시에 없는 id 만 100개씩 묶어 병렬 조회."""
+    found: Dict[str, Dict[str, float]] = {}
+    missing: List[str] = []
+    for tid in dict.fromkeys(ids):
+        hit = FEATURE_CACHE.get(tid)
+        if hit is not None:
+            found[tid] = hit
+        else:
+            missing.append(tid)
+    chunks = [missing[i:i + FEATURES_CHUNK] for i in range(0, len(missing), FEATURES_CHUNK)]
+    if chunks:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            for feats in ex.map(sp.audio_features, chunks):
+                rows = [(f["id"], {k: f[k] for k in FEATURE_KEYS}) for f in feats or [] if f and f.get("id")]
+                FEATURE_CACHE.set_many(rows)
+                found.update(rows)
+    return found
+
+
+def playlist_features(sp, url: str) -> List[Dict[str, Any]]:
+    """analyze_playlist 입력 형태의 트랙 목록 [{name, artist, energy, valence, danceability, tempo}] (피처 없는 곡 제외)"""
+    tracks = playlist_tracks(sp, playlist_id(url))
+    feats = audio_features(sp, [t["id"] for t in tracks])
+    return [{"name": t["name"], "artist": t["artist"], **feats[t["id"]]} for t in tracks if t["id"] in feats]
+
+
+def feature_cache_stats() -> Dict[str, Any]:
+    return FEATURE_CACHE.stats()
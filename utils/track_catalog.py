@@ -0,0 +1,127 @@
+########################################
+# utils/track_catalog.py (로컬 트랙 카탈로그; 덤프 일괄 로드 + 정확/퍼지 매칭, 네트워크 없이 장르 조회)
+########################################
+import os, sys, csv, json, threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from rapidfuzz import fuzz, process
+from utils.track_lookup import normalize_text, track_key
+
+TRACK_CATALOG_PATH = os.getenv("TRACK_CATALOG_PATH", "")
+TRACK_CATALOG_MIN_SCORE = float(os.getenv("TRACK_CATALOG_MIN_SCORE", "90"))   # 퍼지 매칭 최소 점수 (0~100)
+_CDIST_CHUNK = 64   # cdist 한 번에 비교할 질의 수 (질의 × 카탈로그 점수 행렬 크기 제한)
+
+Match = Tuple[str, float]   # (genre, confidence 0~1)
+
+
+class TrackCatalog:
+    """
+    (artist, title, genre) 목록의 메모리 인덱스.
+    - 정확 매칭: 정규화한 (artist, title) 키 → dict 조회
+    - 아티스트가 정확히 있으면: 그 아티스트 곡들의 제목끼리만 퍼지 비교 (후보 수십 개)
+    - 그 외: 카탈로그 전체와 rapidfuzz cdist 벡터 비교
+      (token_sort_ratio → "Title - Artist" 처럼 순서가 바뀐 줄도 맞음; 제목만 있으면 제목끼리 ratio)
+    """
+
+    def __init__(self):
+        self.genres: List[str] = []
+        self._exact: Dict[str, int] = {}
+        self._by_artist: Dict[str, List[int]] = {}
+        self._full: List[str] = []     # "artist title" (정규화)
+        self._titles: List[str] = []   # "title" (정규화)
+
+    def __len__(self) -> int:
+        return len(self.genres)
+
+    def add(self, artist: str, title: str, genre: str):
+        if not genre or not (title or artist):
+            return
+        key = track_key(artist, title)
+        if key in self._exact:
+            self.genres[self._exact[key]] = genre
+            return
+        idx = self._exact[key] = len(self.genres)
+        self.genres.append(genre)
+        a, t = normalize_text(artist), normalize_text(title)
+        self._by_artist.setdefault(a, []).append(idx)
+        self._full.append(f"{a} {t}".strip())
+        self._titles.append(t)
+
+    def extend(self, rows: Iterable[Tuple[str, str, str]]):
+        for artist, title, genre in rows:
+            self.add(artist, title, genre)
+
+    @classmethod
+    def load(cls, path: str) -> "TrackCatalog":
+        """덤프 로드: .jsonl({"artist","title","genre"}) 또는 .csv/.tsv (artist, title, genre 열; 헤더 있어도 됨)"""
+        cat = cls()
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if path.endswith(".jsonl"):
+                rows = (json.loads(ln) for ln in f if ln.strip())
+                cat.extend((r.get("artist", ""), r.get("title", ""), r.get("genre", "")) for r in rows)
+            else:
+                reader = csv.reader(f, delimiter="\t" if path.endswith(".tsv") else ",")
+                for row in reader:
+                    if len(row) < 3 or [c.strip().lower() for c in row[:3]] == ["artist", "title", "genre"]:
+                        continue
+                    cat.add(row[0].strip(), row[1].strip(), row[2].strip())
+        return cat
+
+    def lookup(self, artist: str, title: str, min_score: float = TRACK_CATALOG_MIN_SCORE) -> Optional[Match]:
+        return self.lookup_many([(artist, title)], min_score)[0]
+
+    def lookup_many(self, pairs: List[Tuple[str, str]],
+                    min_score: float = TRACK_CATALOG_MIN_SCORE) -> List[Optional[Match]]:
+        """여러 (artist, title) 를 한꺼번에: 정확 → 아티스트 블록 → 남은 것만 카탈로그 전체 cdist"""
+        out: List[Optional[Match]] = [None] * len(pairs)
+        if not self.genres:
+            return out
+        full: List[Tuple[int, str]] = []
+        titles: List[Tuple[int, str]] = []
+        for i, (artist, title) in enumerate(pairs):
+            idx = self._exact.get(track_key(artist, title))
+            if idx is not None:
+                out[i] = (self.genres[idx], 1.0)
+                continue
+            a, t = normalize_text(artist), normalize_text(title)
+            block = self._by_artist.get(a) if a else None
+            if block and t:
+                best = process.extractOne(t, [self._titles[j] for j in block], scorer=fuzz.ratio,
+                                          processor=None, score_cutoff=min_score)
+                if best is not None:
+                    out[i] = (self.genres[block[best[2]]], round(best[1] / 100.0, 4))
+                    continue
+            if a:
+                full.append((i, f"{a} {t}".strip()))
+            elif t:
+                titles.append((i, t))
+        for items, choices, scorer in ((full, self._full, fuzz.token_sort_ratio), (titles, self._titles, fuzz.ratio)):
+            for s in range(0, len(items), _CDIST_CHUNK):
+                chunk = items[s:s + _CDIST_CHUNK]
+                scores = process.cdist([q for _, q in chunk], choices, scorer=scorer, processor=None,
+                                       score_cutoff=min_score, workers=-1)
+                best = scores.argmax(axis=1)
+                for (i, _), j, row in zip(chunk, best, scores):
+                    if row[j] >= min_score:
+                        out[i] = (self.genres[int(j)], round(float(row[j]) / 100.0, 4))
+        return out
+
+
+_catalog: Optional[TrackCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> TrackCatalog:
+    """
+    TRACK_CATALOG_PATH 의 카탈로그 (처음 부를 때 한 번 로드).
+    경로가 없거나 못 읽거나 깨진 줄이 있으면 경고 후 빈 카탈로그 (매 호출마다 다시 실패하지 않게)
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                try:
+                    _catalog = TrackCatalog.load(TRACK_CATALOG_PATH) if TRACK_CATALOG_PATH else TrackCatalog()
+                except (OSError, ValueError, TypeError, AttributeError, csv.Error) as e:
+                    print(f"[warn] 트랙 카탈로그 로드 실패({TRACK_CATALOG_PATH}): {e!r} → 빈 카탈로그로 진행", file=sys.stderr)
+                    _catalog = TrackCatalog()
+    return _catalog
@@ -1,13 +1,27 @@
 ########################################
 # utils/track_lookup.py (iTunes/MusicBrainz 조회 + 퍼지 매칭)
 ########################################
-from typing import List, Tuple
-import requests
+import os, re, unicodedata
+from typing import List, Tuple, Optional, Dict, Any
 from rapidfuzz import fuzz
+from utils.http import session as http_session, RateLimiter
+from utils.cache import DiskCache
 
 ITUNES_SEARCH = "https://itunes.apple.com/search"
 MB_RECORDING = "https://musicbrainz.org/ws/2/recording/"
 HEADERS = {"User-Agent":"dayline-mcp/1.0 (contact: dev@example.com)"}
+# MusicBrainz 는 클라이언트당 초당 1회 정도만 허용 → 프로세스 전체에서 간격을 맞춘다
+MB_LIMITER = RateLimiter(float(os.getenv("MB_RATE", "1.0")))
+
+# (artist, title) → {genre, source, confidence} 영속 캐시. 못 찾은 곡은 짧은 TTL 로 기억한다.
+TRACK_CACHE = DiskCache(
+    "tracks",
+    max_entries=int(os.getenv("TRACK_CACHE_MAX", "100000")),
+    ttl=float(os.getenv("TRACK_CACHE_TTL", str(30 * 24 * 3600))),
+)
+TRACK_MISS_TTL = float(os.getenv("TRACK_MISS_TTL", str(24 * 3600)))
+_BRACKETS = re.compile(r"[(\[][^)\]]*[)\]]")
+_NON_WORD = re.compile(r"[\W_]+")
 
 
 def parse_line(line: str) -> Tuple[str,str]:
@@ -18,12 +32,37 @@ def parse_line(line: str) -> Tuple[str,str]:
     return "", s
 
 
+def normalize_text(s: str) -> str:
+    """NFKC + 소문자 + 괄호 꼬리표((feat. ...), [Remastered]) 제거 + 기호/공백 정리"""
+    s = unicodedata.normalize("NFKC", s or "").casefold()
+    s = _BRACKETS.sub(" ", s)
+    return _NON_WORD.sub(" ", s).strip()
+
+
+def track_key(artist: str, title: str) -> str:
+    return f"{normalize_text(artist)}\x1f{normalize_text(title)}"
+
+
+def cached_track(artist: str, title: str) -> Optional[Dict[str, Any]]:
+    """캐시에 있으면 {genre, source, confidence} (못 찾은 곡이면 genre="")"""
+    return TRACK_CACHE.get(track_key(artist, title))
+
+
+def store_track(artist: str, title: str, genre: str, source: str, confidence: float):
+    TRACK_CACHE.set(track_key(artist, title),
+                    {"genre": genre or "", "source": source, "confidence": float(confidence)},
+                    ttl=None if genre else TRACK_MISS_TTL)
+
+
+def track_cache_stats() -> Dict[str, Any]:
+    return {**TRACK_CACHE.stats(), "miss_ttl": TRACK_MISS_TTL}
+
+
 def itunes_genre(artist: str, title: str) -> Tuple[str,float]:
     q = f"{artist} {title}".strip()
     params = {"term": q, "media":"music", "limit": 5}
-    r = requests.get(ITUNES_SEARCH, params=params, headers=HEADERS, timeout=10)
-    if not r.ok:
-        return "",0.0
+    r = http_session().get(ITUNES_SEARCH, params=params, headers=HEADERS, timeout=10)
+    r.raise_for_status()   # 403/429/5xx 는 '없음' 이 아니라 실패 → 호출자가 캐시하지 않는다
     items = r.json().get("results",[])
     if not items:
         return "",0.0
@@ -41,9 +80,9 @@ def mb_genre(artist: str, title: str) -> Tuple[str,float]:
     if title:
         query.append(f"recording:{title}")
     params = {"query":" AND ".join(query), "fmt":"json", "limit":5}
-    r = requests.get(MB_RECORDING, params=params, headers=HEADERS, timeout=10)
-    if not r.ok:
-        return "",0.0
+    MB_LIMITER.wait()
+    r = http_session().get(MB_RECORDING, params=params, headers=HEADERS, timeout=10)
+    r.raise_for_status()
     recs = r.json().get("recordings",[])
     if not recs:
         return "",0.0